@@ -0,0 +1,199 @@
+import os
+from collections import namedtuple
+
+import profiling
+from copystatic import copy_file, copy_files, is_up_to_date, sync_files
+from gencontent import generate_pages, record_pages, template_hashes, update_pages
+from manifest import remove_empty_dirs, remove_manifest
+from markdown_blocks import markdown_to_html_node
+from page import render_page
+from plan import PAGE, STATIC, build_plan, jobs_of_kind, scan_files
+from shard import collect_shard_outputs, shard_pages, write_shard_stamp
+from template import Layouts, load_template
+
+BuildConfig = namedtuple(
+    "BuildConfig",
+    [
+        "basepath",
+        "content",
+        "static",
+        "dest",
+        "template",
+        "manifest",
+        "incremental",
+        "link_static",
+        "checksum",
+        "jobs",
+        "io_threads",
+        "explain",
+        "layouts",
+    ],
+    defaults=[
+        "/",
+        "./content",
+        "./static",
+        "./docs",
+        "./template.html",
+        "./.build-manifest.json",
+        False,
+        False,
+        False,
+        1,
+        0,
+        False,
+        "./layouts",
+    ],
+)
+
+
+def render(markdown, template_path=None, basepath="/", cache=None):
+    """Convert one Markdown document to HTML.
+
+    Without a template only the content is returned, wrapped in its <div>.
+    With a template the full page is rendered, which requires a "# " title.
+    """
+    if template_path is None:
+        return markdown_to_html_node(markdown, basepath, cache).to_html()
+    return render_page(markdown, load_template(template_path, basepath), basepath, cache)
+
+
+def render_many(documents, jobs=1, template_path=None, basepath="/", cache=None):
+    """Convert every Markdown document, yielding the HTML in input order.
+
+    The template is compiled once for the whole batch. With jobs > 1 the
+    documents are rendered by that many worker processes, each compiling the
+    template once; all documents are submitted up front and `cache` is not
+    shared with the workers.
+    """
+    if jobs <= 1:
+        for markdown in documents:
+            yield render(markdown, template_path, basepath, cache)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_renderer, initargs=(template_path, basepath)) as executor:
+        yield from executor.map(_render_in_worker, documents, chunksize=16)
+
+
+_worker_options = None
+
+
+def _init_renderer(template_path, basepath):
+    global _worker_options
+    _worker_options = (template_path, basepath)
+    if template_path is not None:
+        load_template(template_path, basepath)
+
+
+def _render_in_worker(markdown):
+    return render(markdown, *_worker_options)
+
+
+def build(config, plan=None, cache=None, store=None):
+    """Build the site described by a BuildConfig: copy the static files and
+    generate every page, fetching pages from the artifacts.ArtifactStore
+    `store` when given. Returns the failed pages as (from_path, exception)
+    pairs, see gencontent.generate_pages."""
+    if plan is None:
+        plan = build_plan(config.content, config.static, config.dest)
+
+    if not config.incremental:
+        # The manifest is written again once the pages are built; until then
+        # it must not vouch for outputs this build is about to replace.
+        remove_manifest(config.manifest)
+        # Outputs that are rebuilt identically are left in place untouched,
+        # so only files no longer produced by the site are deleted.
+        print("Removing stale outputs from public directory...")
+        remove_stale_outputs(config.dest, {os.path.normpath(job.destination) for job in plan})
+
+    print("Copying static files to public directory...")
+    with profiling.stage("static"):
+        static_files = jobs_of_kind(plan, STATIC)
+        if config.incremental:
+            sync_files(static_files, config.dest, config.manifest, config.link_static, config.checksum)
+        else:
+            copy_files(static_files)
+
+    print("Generating content...")
+    pages = jobs_of_kind(plan, PAGE)
+    templates = page_templates(config)
+    if config.incremental:
+        return update_pages(
+            pages,
+            templates,
+            config.dest,
+            config.basepath,
+            config.manifest,
+            config.jobs,
+            cache,
+            config.io_threads,
+            config.explain,
+            store,
+        )
+    # Hashed before generating, so that pages built from a template edited
+    # during the build are rebuilt by the next incremental build.
+    template_inputs = template_hashes(templates, config.basepath)
+    failures = generate_pages(pages, templates, config.basepath, config.jobs, cache, config.io_threads, store)
+    record_pages(pages, static_files, templates, config.basepath, config.manifest, failures, template_inputs)
+    return failures
+
+
+def build_shard(config, index, count, shard_dir_path, plan=None, cache=None, store=None):
+    """Generate the pages of shard index of count into shard_dir_path, laid
+    out as they would be in the public directory, and stamp it with the
+    basepath, renderer version and shard count. Static files are left to
+    merge_shards."""
+    if plan is None:
+        plan = build_plan(config.content, config.static, config.dest)
+    pages = [
+        (from_path, os.path.join(shard_dir_path, os.path.relpath(dest_path, config.dest)))
+        for from_path, dest_path in shard_pages(jobs_of_kind(plan, PAGE), index, count)
+    ]
+    size = sum(os.path.getsize(from_path) for from_path, _ in pages)
+    print(f"Generating shard {index}/{count}: {len(pages)} pages, {size} source bytes...")
+    remove_stale_outputs(shard_dir_path, {os.path.normpath(dest_path) for _, dest_path in pages})
+    failures = generate_pages(pages, page_templates(config), config.basepath, config.jobs, cache, config.io_threads, store)
+    write_shard_stamp(shard_dir_path, config.basepath, index, count)
+    return failures
+
+
+def merge_shards(config, shard_dir_paths, plan=None):
+    """Assemble the public directory from the static files and the outputs
+    of every shard, after checking that the shards were built for this
+    basepath and renderer, that no two of them produce the same file and that
+    every page was built. Pages identical to the ones already in
+    place are not copied. The manifest is removed, so the next incremental
+    build regenerates every page."""
+    if plan is None:
+        plan = build_plan(config.content, config.static, config.dest)
+    static_files = jobs_of_kind(plan, STATIC)
+    page_dest_paths = [dest_path for _, dest_path in jobs_of_kind(plan, PAGE)]
+    pages = collect_shard_outputs(shard_dir_paths, config.dest, static_files, page_dest_paths, config.basepath)
+
+    remove_manifest(config.manifest)
+    print("Removing stale outputs from public directory...")
+    remove_stale_outputs(config.dest, {os.path.normpath(dest_path) for _, dest_path in static_files + pages})
+    print("Copying static files to public directory...")
+    copy_files(static_files)
+    print(f"Merging {len(shard_dir_paths)} shards...")
+    for from_path, dest_path in pages:
+        if not is_up_to_date(from_path, dest_path, checksum=True):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_file(from_path, dest_path)
+
+
+def remove_stale_outputs(dest_dir_path, live):
+    if not os.path.isdir(dest_dir_path):
+        return
+    for path in list(scan_files(dest_dir_path)):
+        if os.path.normpath(path) not in live:
+            os.remove(path)
+            remove_empty_dirs(os.path.dirname(path), dest_dir_path)
+
+
+def page_templates(config):
+    """The template of every page, or a Layouts choosing one per page when
+    the layouts directory exists."""
+    if os.path.isdir(config.layouts):
+        return Layouts(config.layouts, config.content, config.template)
+    return config.template
@@ -0,0 +1,74 @@
+import hashlib
+import os
+
+from markdown_blocks import RENDERER_VERSION
+
+
+def artifact_key(source_hash, template, basepath):
+    """Content address of a rendered page: everything its HTML depends on."""
+    digest = hashlib.sha256()
+    for part in (RENDERER_VERSION, basepath, template.digest, source_hash):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Maps artifact keys to rendered pages.
+
+    Stores may be shared by any number of concurrent builds, so put must be
+    atomic: a reader sees either no artifact or a complete one. Subclasses
+    backed by a shared filesystem or an object store implement get and put.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the bytes stored under key, or None."""
+        raise NotImplementedError("get method not implemented")
+
+    def put(self, key, data):
+        raise NotImplementedError("put method not implemented")
+
+    def fetch(self, key):
+        data = self.get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def stats(self):
+        return f"artifact store: {self.hits} hits, {self.misses} misses"
+
+
+class LocalDirectoryStore(ArtifactStore):
+    """Artifacts stored as files under root, fanned out by key prefix."""
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def __repr__(self):
+        return f"LocalDirectoryStore({self.root!r})"
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per process, as several builds may write the same artifact.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,451 @@
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from api import render_many
+from gencontent import generate_page, generate_pages_recursive
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import extract_markdown_images, extract_markdown_links, text_to_textnodes, text_to_textnodes_reference
+from markdown_blocks import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from server import make_server, serve_in_thread
+from textnode import TextNode, TextType
+
+BENCHMARKS = []
+SCRATCH_DIRS = []
+
+WORDS = ["tolkien", "hobbit", "ring", "elf", "dwarf", "wizard", "shire", "mordor", "river", "mountain"]
+
+
+def benchmark(name):
+    """Register a benchmark. The decorated function receives the corpus
+    scale and returns the zero-argument callable to time."""
+
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+
+    return register
+
+
+def scratch_dir():
+    """Temporary directory that is removed once the current benchmark ends."""
+    path = tempfile.mkdtemp(prefix="md-to-html-bench-")
+    SCRATCH_DIRS.append(path)
+    return path
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraphs_document(rng, count):
+    blocks = ["# Paragraphs"]
+    for _ in range(count):
+        blocks.append(f"{sentence(rng)} **{sentence(rng, 2)}** {sentence(rng)} _{sentence(rng, 2)}_ `{rng.choice(WORDS)}`")
+    return "\n\n".join(blocks) + "\n"
+
+
+def lists_document(rng, count, items=50):
+    blocks = ["# Lists"]
+    for _ in range(count):
+        blocks.append("\n".join(f"- {sentence(rng, 6)}" for _ in range(items)))
+        blocks.append("\n".join(f"{i}. {sentence(rng, 6)}" for i in range(1, items + 1)))
+    return "\n\n".join(blocks) + "\n"
+
+
+def links_document(rng, count, links=40):
+    blocks = ["# Links"]
+    for _ in range(count):
+        parts = []
+        for i in range(links):
+            parts.append(f"[{rng.choice(WORDS)} {i}](/{rng.choice(WORDS)}/{i}) and ![{rng.choice(WORDS)}](/images/{i}.png)")
+        blocks.append(" ".join(parts))
+    return "\n\n".join(blocks) + "\n"
+
+
+def code_document(rng, lines):
+    body = "\n".join(f"    {sentence(rng, 8)} = **not bold** _nor italic_" for _ in range(lines))
+    return f"# Code\n\n```\n{body}\n```\n"
+
+
+def mixed_document(rng, scale):
+    return "\n".join(
+        [
+            paragraphs_document(rng, scale),
+            lists_document(rng, max(1, scale // 20)),
+            links_document(rng, max(1, scale // 20)),
+            code_document(rng, scale),
+        ]
+    )
+
+
+def write_corpus(root, files, scale, seed=0):
+    """Write `files` Markdown documents under root, spread over nested
+    directories, and return the content directory."""
+    rng = random.Random(seed)
+    content = os.path.join(root, "content")
+    for i in range(files):
+        dir_path = os.path.join(content, f"section{i % 10}", f"page{i}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), "w") as f:
+            f.write(mixed_document(rng, scale))
+    return content
+
+
+def corpus(scale):
+    rng = random.Random(0)
+    return {
+        "paragraphs": paragraphs_document(rng, 500 * scale),
+        "lists": lists_document(rng, 20 * scale),
+        "links": links_document(rng, 20 * scale),
+        "code": code_document(rng, 2000 * scale),
+    }
+
+
+def inline_texts(markdown):
+    return [block for block in markdown_to_blocks(markdown) if block_to_block_type(block) == BlockType.PARAGRAPH]
+
+
+for _kind in ("paragraphs", "lists", "links", "code"):
+
+    @benchmark(f"markdown_to_blocks/{_kind}")
+    def _blocks(scale, kind=_kind):
+        markdown = corpus(scale)[kind]
+        return lambda: markdown_to_blocks(markdown)
+
+    @benchmark(f"block_to_block_type/{_kind}")
+    def _block_types(scale, kind=_kind):
+        blocks = markdown_to_blocks(corpus(scale)[kind])
+        return lambda: [block_to_block_type(block) for block in blocks]
+
+    @benchmark(f"markdown_to_html_node/{_kind}")
+    def _parse(scale, kind=_kind):
+        markdown = corpus(scale)[kind]
+        return lambda: markdown_to_html_node(markdown)
+
+    @benchmark(f"to_html/{_kind}")
+    def _serialize(scale, kind=_kind):
+        node = markdown_to_html_node(corpus(scale)[kind])
+        return node.to_html
+
+
+for _kind in ("paragraphs", "links"):
+
+    @benchmark(f"text_to_textnodes/{_kind}")
+    def _inline(scale, kind=_kind):
+        texts = inline_texts(corpus(scale)[kind])
+        return lambda: [text_to_textnodes(text) for text in texts]
+
+
+for _kind in ("paragraphs", "links"):
+
+    @benchmark(f"extract_markdown_links/{_kind}")
+    def _links(scale, kind=_kind):
+        texts = inline_texts(corpus(scale)[kind])
+        return lambda: [(extract_markdown_images(text), extract_markdown_links(text)) for text in texts]
+
+
+# Single paragraphs built to stress the inline parser: long runs of
+# delimiters, links and images, and brackets that never close. Inline
+# parsing is linear, so doubling --scale should double these timings.
+ADVERSARIAL = {
+    "links": lambda n: " ".join(f"[link {i}](/u/{i})" for i in range(n)),
+    "images": lambda n: " ".join(f"![image {i}](/i/{i}.png)" for i in range(n)),
+    "links_and_images": lambda n: "".join("[a](/u)![b](/i)" for _ in range(n)),
+    "delimiters": lambda n: "**a** _b_ `c` " * n,
+    "delimiter_run": lambda n: "**" * (2 * n) + "_" * (2 * n) + "`" * (2 * n),
+    "open_brackets": lambda n: "[" * n + "a" + "](" * n,
+    "unclosed_links": lambda n: "[a](" * n,
+    "nested_brackets": lambda n: "[" * n + "x" + "]" * n + "(/u)",
+}
+
+for _kind, _generate in ADVERSARIAL.items():
+
+    @benchmark(f"adversarial/{_kind}")
+    def _adversarial(scale, generate=_generate):
+        text = generate(20000 * scale)
+        return lambda: text_to_textnodes(text)
+
+    @benchmark(f"adversarial/{_kind}/reference")
+    def _adversarial_reference(scale, generate=_generate):
+        text = generate(20000 * scale)
+        return lambda: text_to_textnodes_reference(text)
+
+
+# Shared by every ParentNode built below, so that node_memory measures the
+# node itself rather than a fresh children list.
+_CHILDREN = []
+
+NODE_FACTORIES = {
+    "LeafNode": lambda: LeafNode("b", "text"),
+    "LeafNode/props": lambda: LeafNode("a", "text", {"href": "/x"}),
+    "ParentNode": lambda: ParentNode("p", _CHILDREN),
+    "TextNode": lambda: TextNode("text", TextType.TEXT),
+}
+
+for _kind, _factory in NODE_FACTORIES.items():
+
+    @benchmark(f"construct/{_kind}")
+    def _construct(scale, factory=_factory):
+        return lambda: [factory() for _ in range(10000 * scale)]
+
+
+def node_memory(count=10000):
+    """Bytes allocated per node for each node class, measured with
+    tracemalloc and excluding the list holding the nodes."""
+    memory = {}
+    for kind, factory in NODE_FACTORIES.items():
+        nodes = [None] * count
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            nodes[i] = factory()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        memory[kind] = (after - before) / count
+    return memory
+
+
+@benchmark("generate_page/large")
+def _large_page(scale):
+    root = scratch_dir()
+    source = os.path.join(root, "index.md")
+    with open(source, "w") as f:
+        f.write(mixed_document(random.Random(0), 2000 * scale))
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as f:
+        f.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+    dest = os.path.join(root, "index.html")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(source, template, dest, "/")
+
+    return run
+
+
+@benchmark("generate_pages_recursive/site")
+def _site(scale):
+    root = scratch_dir()
+    content = write_corpus(root, 100 * scale, 10)
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as f:
+        f.write('<html><head><title>{{ Title }}</title><link href="/index.css"></head><body>{{ Content }}</body></html>')
+    dest = os.path.join(root, "docs")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, dest, "/base/")
+
+    return run
+
+
+for _jobs in (1, 4):
+
+    @benchmark(f"render_many/jobs{_jobs}")
+    def _render_many(scale, jobs=_jobs):
+        rng = random.Random(0)
+        documents = [mixed_document(rng, 10) for _ in range(200 * scale)]
+        return lambda: list(render_many(documents, jobs))
+
+
+@benchmark("server/render")
+def _server(scale):
+    root = scratch_dir()
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as f:
+        f.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+    server = make_server(template, "/base/", port=0, quiet=True)
+    serve_in_thread(server)
+    rng = random.Random(0)
+    documents = [mixed_document(rng, 10).encode("utf-8") for _ in range(100 * scale)]
+
+    def run():
+        connection = http.client.HTTPConnection(*server.server_address)
+        try:
+            for document in documents:
+                connection.request("POST", "/render", body=document)
+                connection.getresponse().read()
+        finally:
+            connection.close()
+
+    return run
+
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Command lines of main.py whose startup is measured, run in a small site.
+STARTUP_COMMANDS = {
+    "help": ["--help"],
+    "render-file": ["render-file", os.path.join("content", "section0", "page0", "index.md")],
+    "copy-static": ["copy-static"],
+    "build": ["build"],
+}
+
+# Milliseconds each command may spend importing modules beyond what the bare
+# interpreter imports, about 1.4x what an idle machine measures. Commands
+# other than build go over as soon as they import the build pipeline.
+STARTUP_BUDGET_MS = {"help": 35, "render-file": 75, "copy-static": 55, "build": 110}
+
+
+def startup_site():
+    root = scratch_dir()
+    write_corpus(root, 1, 1)
+    os.makedirs(os.path.join(root, "static"))
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { margin: 0; }\n")
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+    return root
+
+
+def run_main(root, argv, *options):
+    return subprocess.run([sys.executable, *options, MAIN, *argv], cwd=root, capture_output=True, text=True, check=True)
+
+
+def import_times(stderr):
+    """Cumulative microseconds of every top-level import in the output of
+    python -X importtime."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def startup_report(repeat=5, names=None):
+    """Best time spent importing modules by each of STARTUP_COMMANDS, or by
+    those in names, over repeat runs, leaving out the modules the interpreter
+    imports by itself."""
+    try:
+        root = startup_site()
+        interpreter = import_times(subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True).stderr)
+        report = {}
+        for name, argv in STARTUP_COMMANDS.items():
+            if names is not None and name not in names:
+                continue
+            best = None
+            for _ in range(repeat):
+                times = import_times(run_main(root, argv, "-X", "importtime").stderr)
+                total = sum(time for module, time in times.items() if module not in interpreter) / 1000
+                best = total if best is None else min(best, total)
+            report[name] = {"imports_ms": best, "budget_ms": STARTUP_BUDGET_MS[name]}
+        return report
+    finally:
+        while SCRATCH_DIRS:
+            shutil.rmtree(SCRATCH_DIRS.pop(), ignore_errors=True)
+
+
+def over_budget(startup):
+    return [
+        f"{name} spends {result['imports_ms']:.1f} ms importing modules, over its {result['budget_ms']} ms budget"
+        for name, result in startup.items()
+        if result["imports_ms"] > result["budget_ms"]
+    ]
+
+
+for _name, _argv in STARTUP_COMMANDS.items():
+
+    @benchmark(f"startup/{_name}")
+    def _startup(scale, argv=_argv):
+        root = startup_site()
+        return lambda: run_main(root, argv)
+
+
+def time_benchmark(setup, scale, repeat):
+    try:
+        run = setup(scale)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        while SCRATCH_DIRS:
+            shutil.rmtree(SCRATCH_DIRS.pop(), ignore_errors=True)
+
+
+def run_benchmarks(scale=1, repeat=5, pattern=None):
+    results = []
+    for name, setup in BENCHMARKS:
+        if pattern is not None and pattern not in name:
+            continue
+        timings = time_benchmark(setup, scale, repeat)
+        results.append({"name": name, "best": min(timings), "mean": sum(timings) / len(timings), "repeat": repeat})
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "results": results,
+        "memory_per_node": node_memory(),
+    }
+    # Startup is only measured, and held to its budget, with the startup
+    # benchmarks, as it spawns several processes per command.
+    startup = [result["name"].removeprefix("startup/") for result in results if result["name"].startswith("startup/")]
+    if startup:
+        report["startup"] = startup_report(repeat, startup)
+    return report
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(report, baseline):
+    previous = {result["name"]: result["best"] for result in baseline["results"]}
+    lines = []
+    for result in report["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        lines.append(f"{result['name']:<45} {before * 1000:10.2f} ms -> {result['best'] * 1000:10.2f} ms  x{before / result['best']:.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the parse, render and write pipeline.")
+    parser.add_argument("--scale", type=int, default=1, help="corpus size multiplier")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", dest="pattern", help="only run benchmarks whose name contains this string")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON report from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scale, args.repeat, args.pattern)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+    problems = over_budget(report.get("startup", {}))
+    if problems:
+        print("\n".join(problems), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
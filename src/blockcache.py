@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from htmlnode import LeafNode
+from markdown_blocks import RENDERER_VERSION, block_to_html_node
+
+
+class BlockCache:
+    """Size-bounded LRU cache of rendered block HTML.
+
+    Entries are keyed by a hash of the block text and the basepath, so
+    identical blocks shared between pages (disclaimers, tables of contents,
+    vendored READMEs) are only parsed once. A hit is returned as a tagless
+    LeafNode holding the cached HTML, which serializes to the same output as
+    the freshly parsed block.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(block, basepath):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(basepath.encode())
+        digest.update(b"\0")
+        digest.update(block.encode())
+        return digest.hexdigest()
+
+    def block_to_html_node(self, block, basepath="/"):
+        key = self.key(block, basepath)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return LeafNode(None, html)
+        self.misses += 1
+        html = block_to_html_node(block, basepath).to_html()
+        self.entries[key] = html
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return LeafNode(None, html)
+
+    def stats(self):
+        return f"block cache: {self.hits} hits, {self.misses} misses, {len(self.entries)}/{self.maxsize} entries"
+
+    @classmethod
+    def load(cls, path, maxsize=4096):
+        cache = cls(maxsize)
+        if not os.path.exists(path):
+            return cache
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if not isinstance(data, dict) or data.get("renderer") != RENDERER_VERSION:
+            return cache
+        for key, html in data.get("entries", [])[-maxsize:]:
+            cache.entries[key] = html
+        return cache
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"renderer": RENDERER_VERSION, "entries": list(self.entries.items())}, f)
+        os.replace(tmp_path, path)
@@ -1,16 +1,125 @@
 import os
 import shutil
 
+from manifest import BuildManifest, hash_file, remove_empty_dirs
+from plan import plan_static
+
 
 def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    copy_files(collect_files(source_dir_path, dest_dir_path))
+
+
+def copy_files(files):
+    created = set()
+    for from_path, dest_path in files:
+        print(f" * {from_path} -> {dest_path}")
+        dest_dir_path = os.path.dirname(dest_path)
+        if dest_dir_path not in created:
+            os.makedirs(dest_dir_path, exist_ok=True)
+            created.add(dest_dir_path)
+        copy_file(from_path, dest_path)
+
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
+def sync_files_recursive(source_dir_path, dest_dir_path, manifest_path, link=False, checksum=False):
+    files = collect_files(source_dir_path, dest_dir_path)
+    sync_files(files, dest_dir_path, manifest_path, link, checksum)
+
+
+def sync_files(files, dest_dir_path, manifest_path, link=False, checksum=False):
+    """Bring the (from_path, dest_path) copies in files up to date without
+    deleting dest_dir_path first: unchanged files are skipped, changed ones
+    are copied (or hard linked when link is set) and outputs whose source was
+    deleted since the previous sync are removed.
+
+    Files count as unchanged when size and mtime match, or, with checksum,
+    when their contents hash the same. Copies preserve mtime so the next
+    sync can skip them.
+    """
+    manifest = BuildManifest.load(manifest_path)
+    live = {}
+    skipped = 0
+    for from_path, dest_path in files:
+        live[os.path.normpath(dest_path)] = from_path
+        if is_up_to_date(from_path, dest_path, checksum):
+            skipped += 1
+            continue
         print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if link:
+            link_file(from_path, dest_path)
+        else:
+            copy_file(from_path, dest_path)
+
+    for dest_path in sorted(set(manifest.static) - set(live)):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+        print(f" * removed {dest_path}")
+    manifest.static = live
+    manifest.save()
+    print(f" * {skipped} unchanged static files skipped")
+
+
+def collect_files(source_dir_path, dest_dir_path):
+    return [(job.source, job.destination) for job in plan_static(source_dir_path, dest_dir_path)]
+
+
+def is_up_to_date(from_path, dest_path, checksum=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if (from_stat.st_dev, from_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(from_path) == hash_file(dest_path)
+    return from_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def link_file(from_path, dest_path):
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        os.link(from_path, tmp_path)
+    except OSError:
+        # Cross-device or unsupported: fall back to a real copy.
+        copy_file(from_path, dest_path)
+        return
+    os.replace(tmp_path, dest_path)
+
+
+def copy_file(from_path, dest_path):
+    # Copy into a temporary file and rename it over the destination, so a
+    # destination that is a hard link to the source is never written through.
+    tmp_path = f"{dest_path}.tmp"
+    with open(from_path, "rb") as src, open(tmp_path, "wb") as dst:
+        copy_file_range(src, dst)
+    shutil.copystat(from_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def copy_file_range(src, dst):
+    """Copy using os.copy_file_range where available, which lets the kernel
+    copy in place or share extents (reflinks) on filesystems that support it,
+    and fall back to shutil.copyfileobj otherwise."""
+    if hasattr(os, "copy_file_range"):
+        size = os.fstat(src.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            if copied != 0:
+                raise
         else:
-            copy_files_recursive(from_path, dest_path)
+            if copied == size:
+                return
+        src.seek(copied)
+        dst.seek(copied)
+    shutil.copyfileobj(src, dst)
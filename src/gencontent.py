@@ -1,48 +1,321 @@
+import contextlib
 import os
-from pathlib import Path
-from markdown_blocks import markdown_to_html_node
 
+import output
+import profiling
+from artifacts import artifact_key
+from blockcache import BlockCache
+from htmlnode import ParentNode
+from manifest import BuildManifest, hash_file
+from markdown_blocks import block_to_html_node, iter_chunk_blocks, iter_markdown_blocks
+from page import extract_title, extract_title_from_lines, render_page  # noqa: F401 (re-exported)
+from pipeline import run_pipeline
+from plan import plan_pages
+from template import load_template, page_template_path, template_paths
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
-        else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
 
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, basepath, jobs=1, cache=None, io_threads=0, store=None
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    return generate_pages(pages, template_path, basepath, jobs, cache, io_threads, store)
 
-def generate_page(from_path, template_path, dest_path, basepath):
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest_path,
+    jobs=1,
+    cache=None,
+    io_threads=0,
+    explain=False,
+    store=None,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    return update_pages(
+        pages, template_path, dest_dir_path, basepath, manifest_path, jobs, cache, io_threads, explain, store
+    )
+
+
+def update_pages(
+    pages,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest_path,
+    jobs=1,
+    cache=None,
+    io_threads=0,
+    explain=False,
+    store=None,
+):
+    """Generate only the pages whose dependencies changed since the build
+    recorded in the manifest, and remove outputs of pages that no longer
+    exist. With explain, print why each regenerated page is stale."""
+    manifest = BuildManifest.load(manifest_path)
+    template_inputs = {}
+    live = set()
+    stale = []
+    for from_path, dest_path in pages:
+        dest_key = os.path.normpath(dest_path)
+        live.add(dest_key)
+        inputs = page_inputs(from_path, template_path, basepath, template_inputs)
+        reasons = manifest.stale_reasons(dest_key, inputs, basepath)
+        if reasons:
+            if explain:
+                print(f" ? {dest_key}: {'; '.join(reasons)}")
+            stale.append((from_path, dest_path, dest_key, inputs))
+    skipped = len(live) - len(stale)
+
+    pages = [(from_path, dest_path) for from_path, dest_path, _, _ in stale]
+    failures = generate_pages(pages, template_path, basepath, jobs, cache, io_threads, store)
+    failed = {from_path for from_path, _ in failures}
+    for from_path, _, dest_key, inputs in stale:
+        if from_path not in failed:
+            manifest.record(dest_key, from_path, inputs, basepath)
+    for dest_path in manifest.prune(live, dest_dir_path):
+        print(f" * removed {dest_path}")
+    manifest.save()
+    print(f" * {skipped} unchanged pages skipped")
+    return failures
+
+
+def page_inputs(from_path, template_path, basepath, template_inputs):
+    """Hashes of the source, template and partials of a page, as recorded in
+    the manifest. The template hashes are those of the text the template was
+    compiled from; template_inputs caches them between calls."""
+    page_template = page_template_path(template_path, from_path)
+    if page_template not in template_inputs:
+        template_inputs[page_template] = load_template(page_template, basepath).hashes
+    return {from_path: hash_file(from_path), **template_inputs[page_template]}
+
+
+def template_hashes(template_path, basepath):
+    """The template hashes of every template of a build, in the form of
+    page_inputs' template_inputs. Templates that fail to load are left out."""
+    template_inputs = {}
+    for path in template_paths(template_path):
+        try:
+            template_inputs[path] = load_template(path, basepath).hashes
+        except (OSError, ValueError):
+            pass
+    return template_inputs
+
+
+def record_pages(pages, static_files, template_path, basepath, manifest_path, failures=(), template_inputs=None):
+    """Replace the manifest with one describing a full build of pages and
+    static_files, leaving out the failed pages so the next incremental build
+    retries them. template_inputs, from template_hashes, should be taken
+    before the pages are generated."""
+    manifest = BuildManifest(manifest_path)
+    failed = {from_path for from_path, _ in failures}
+    template_inputs = {} if template_inputs is None else dict(template_inputs)
+    for from_path, dest_path in pages:
+        if from_path not in failed:
+            inputs = page_inputs(from_path, template_path, basepath, template_inputs)
+            manifest.record(os.path.normpath(dest_path), from_path, inputs, basepath)
+    manifest.static = {os.path.normpath(dest_path): from_path for from_path, dest_path in static_files}
+    manifest.save()
+
+
+def generate_pages(pages, template_path, basepath, jobs=1, cache=None, io_threads=0, store=None):
+    """Generate every (from_path, dest_path) pair, spreading the work over
+    `jobs` worker processes when jobs > 1, or overlapping file I/O with
+    rendering on `io_threads` threads when io_threads > 0. template_path is
+    either the template of every page or a template.Layouts choosing one per
+    page.
+
+    The serial path raises on the first error. In the other modes a failing
+    page does not stop the others; failures are reported and returned as a
+    list of (from_path, exception) pairs in page order. Each worker process
+    uses its own empty block cache of the same size as `cache`.
+
+    With an artifacts.ArtifactStore, pages already rendered from the same
+    inputs are fetched from it instead of being rendered, and newly rendered
+    pages are added to it.
+    """
+    if jobs <= 1 and io_threads > 0:
+        return generate_pages_pipelined(pages, template_path, basepath, io_threads, cache, store)
+    if jobs <= 1:
+        for from_path, dest_path in pages:
+            generate_page(from_path, template_path, dest_path, basepath, cache, store)
+        return []
+
+    # Imported here: concurrent.futures pulls in multiprocessing and logging,
+    # which single-process callers would pay for at startup.
+    from concurrent.futures import ProcessPoolExecutor
+
+    failures = []
+    cache_size = None if cache is None else cache.maxsize
+    initargs = (cache_size, output.fsync_outputs, store)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        futures = [
+            executor.submit(_generate_page_in_worker, from_path, template_path, dest_path, basepath)
+            for from_path, dest_path in pages
+        ]
+        for (from_path, _), future in zip(pages, futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f" ! {from_path}: {e}")
+                failures.append((from_path, e))
+    return failures
+
+
+def generate_pages_pipelined(pages, template_path, basepath, io_threads=4, cache=None, store=None):
+    """Generate pages with sources read and outputs written on I/O threads
+    while the calling thread renders, see pipeline.run_pipeline."""
+    # Create every output directory once up front instead of per page.
+    for dir_path in sorted({os.path.dirname(dest_path) for _, dest_path in pages} - {""}):
+        os.makedirs(dir_path, exist_ok=True)
+
+    def read(page):
+        with open(page[0], "r") as from_file:
+            return from_file.read()
+
+    def render(page, markdown):
+        page_template = page_template_path(template_path, page[0])
+        print(f" * {page[0]} {page_template} -> {page[1]}")
+        with profiling.page(str(page[0])):
+            template = load_template(page_template, basepath)
+            if store is None:
+                return render_page(markdown, template, basepath, cache)
+            with profiling.stage("artifacts"):
+                key = artifact_key(hash_file(page[0]), template, basepath)
+                html = store.fetch(key)
+            if html is not None:
+                return html.decode("utf-8")
+            html = render_page(markdown, template, basepath, cache)
+            with profiling.stage("artifacts"):
+                store.put(key, html.encode("utf-8"))
+            return html
+
+    def write(page, html):
+        output.write_if_changed(page[1], html)
+
+    failures = []
+    for (from_path, _), e in run_pipeline(pages, read, render, write, io_threads):
+        print(f" ! {from_path}: {e}")
+        failures.append((from_path, e))
+    return failures
+
+
+_worker_cache = None
+_worker_store = None
+
+
+def _init_worker(cache_size, fsync_outputs=False, store=None):
+    global _worker_cache, _worker_store
+    output.fsync_outputs = fsync_outputs
+    _worker_store = store
+    if cache_size is not None:
+        _worker_cache = BlockCache(cache_size)
+
+
+def _generate_page_in_worker(from_path, template_path, dest_path, basepath):
+    generate_page(from_path, template_path, dest_path, basepath, _worker_cache, _worker_store)
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    return [(job.source, job.destination) for job in plan_pages(dir_path_content, dest_dir_path)]
+
+
+def generate_page(from_path, template_path, dest_path, basepath, cache=None, store=None):
+    template_path = page_template_path(template_path, from_path)
     print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
-
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
-
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
-
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-
-
-def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise ValueError("no title found")
+    with profiling.page(str(from_path)):
+        with profiling.stage("template"):
+            template = load_template(template_path, basepath)
+
+        dest_dir_path = os.path.dirname(dest_path)
+        if dest_dir_path != "":
+            os.makedirs(dest_dir_path, exist_ok=True)
+        if store is not None:
+            with profiling.stage("artifacts"):
+                key = artifact_key(hash_file(from_path), template, basepath)
+                html = store.fetch(key)
+            if html is not None:
+                with output.AtomicOutput(dest_path) as to_file:
+                    to_file.write_bytes(html)
+                return
+
+        with open_source(from_path) as (title, iter_blocks):
+
+            def content():
+                # Blocks are parsed and serialized one at a time, so only the
+                # block being rendered is held in memory.
+                blocks = profiling.timed("blocks", iter_blocks())
+                render_block = block_to_html_node if cache is None else cache.block_to_html_node
+                nodes = profiling.timed("parse", (render_block(block, basepath) for block in blocks))
+                return profiling.timed("serialize", ParentNode("div", nodes).iter_html())
+
+            with output.AtomicOutput(dest_path) as to_file:
+                chunks = profiling.timed("template", template.iter_render({"Title": title, "Content": content}))
+                if store is not None:
+                    rendered = []
+                    chunks = _collect(chunks, rendered)
+                profiling.write_chunks(to_file, chunks)
+        if store is not None:
+            with profiling.stage("artifacts"):
+                store.put(key, "".join(rendered).encode("utf-8"))
+
+
+def _collect(chunks, collected):
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+
+
+@contextlib.contextmanager
+def open_source(from_path):
+    """Open a Markdown source and yield its title and a function returning
+    an iterator over its blocks.
+
+    The file is read in binary chunks: block boundaries are found in the raw
+    bytes and each block is decoded as it is rendered. Files with "\r" line
+    endings, which text mode would translate, are read line by line instead.
+    The file is not memory-mapped, as a mapped file truncated while it is
+    read (an editor saving it under the watcher, say) kills the process.
+    """
+    with open(from_path, "rb") as from_file:
+        with profiling.stage("read"):
+            title = scan_source(from_file)
+        if title is not None:
+
+            def iter_chunks():
+                from_file.seek(0)
+                return profiling.timed("read", iter(lambda: from_file.read(READ_CHUNK_SIZE), b""))
+
+            yield title, lambda: iter_chunk_blocks(iter_chunks())
+            return
+    with open(from_path, "r") as from_file:
+        title = extract_title_from_lines(profiling.timed("read", from_file))
+
+        def iter_blocks():
+            from_file.seek(0)
+            return iter_markdown_blocks(profiling.timed("read", from_file))
+
+        yield title, iter_blocks
+
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def scan_source(from_file):
+    """Return the title of the binary Markdown file, or None if it contains
+    "\r" and must be read in text mode."""
+    title = None
+    for line in from_file:
+        if b"\r" in line:
+            return None
+        if line.startswith(b"# "):
+            title = line[2:].removesuffix(b"\n").decode("utf-8")
+            break
+    for chunk in iter(lambda: from_file.read(READ_CHUNK_SIZE), b""):
+        if b"\r" in chunk:
+            return None
+    if title is None:
+        raise ValueError("no title found")
+    return title
@@ -2,8 +2,62 @@ import re
 
 from textnode import TextNode, TextType
 
+DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 
 def text_to_textnodes(text):
+    """Single-pass equivalent of text_to_textnodes_reference."""
+    nodes = []
+    bold = italic = code = False
+    section_start = 0
+    for match in DELIMITER_PATTERN.finditer(text):
+        delimiter = match.group()
+        if delimiter == "**":
+            if italic or code:
+                raise ValueError("invalid markdown, formatted section not closed")
+            _append_section(text, section_start, match.start(), TextType.BOLD if bold else None, nodes)
+            bold = not bold
+        elif bold:
+            continue
+        elif delimiter == "_":
+            if code:
+                raise ValueError("invalid markdown, formatted section not closed")
+            _append_section(text, section_start, match.start(), TextType.ITALIC if italic else None, nodes)
+            italic = not italic
+        elif italic:
+            continue
+        else:
+            _append_section(text, section_start, match.start(), TextType.CODE if code else None, nodes)
+            code = not code
+        section_start = match.end()
+    if bold or italic or code:
+        raise ValueError("invalid markdown, formatted section not closed")
+    _append_section(text, section_start, len(text), None, nodes)
+    return nodes
+
+
+def _append_section(text, start, end, text_type, nodes):
+    if start == end:
+        return
+    if text_type is not None:
+        nodes.append(TextNode(text[start:end], text_type))
+        return
+    cursor = start
+    if text.find("[", start, end) != -1:
+        for match in IMAGE_OR_LINK_PATTERN.finditer(text, start, end):
+            if match.start() > cursor:
+                nodes.append(TextNode(text[cursor : match.start()], TextType.TEXT))
+            bang, label, url = match.groups()
+            nodes.append(TextNode(label, TextType.IMAGE if bang else TextType.LINK, url))
+            cursor = match.end()
+    if cursor < end:
+        nodes.append(TextNode(text[cursor:end], TextType.TEXT))
+
+
+def text_to_textnodes_reference(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
@@ -35,66 +89,46 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, "![{}]({})", TextType.IMAGE, "image")
 
 
 def split_nodes_link(old_nodes):
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, "[{}]({})", TextType.LINK, "link")
+
+
+def _split_nodes_pattern(old_nodes, pattern, markdown, text_type, kind):
+    """Split every text node around the matches of pattern in linear time."""
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        text = old_node.text
+        cursor = 0
+        for match in pattern.finditer(text) if "[" in text else ():
+            label, url = match.groups()
+            source = markdown.format(label, url)
+            start = text.find(source, cursor)
+            if start == -1:
+                raise ValueError(f"invalid markdown, {kind} section not closed")
+            if start > cursor:
+                new_nodes.append(TextNode(text[cursor:start], TextType.TEXT))
+            new_nodes.append(TextNode(label, text_type, url))
+            cursor = start + len(source)
+        if cursor == 0:
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif cursor < len(text):
+            new_nodes.append(TextNode(text[cursor:], TextType.TEXT))
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    if "[" not in text:
+        return []
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    if "[" not in text:
+        return []
+    return LINK_PATTERN.findall(text)
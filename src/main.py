@@ -1,31 +1,336 @@
+import argparse
 import os
-import shutil
 import sys
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
-
-if len(sys.argv) >= 2:
-    basepath = sys.argv[1]
-else:
-    basepath = '/'
+# Only the standard library modules every command needs are imported here.
+# Each command imports the rest itself, so rendering one file or copying the
+# static files does not pay for loading the whole build pipeline.
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+dir_path_layouts = "./layouts"
+manifest_path = "./.build-manifest.json"
+dir_path_shards = "./shards"
+
+COMMANDS = ("build", "render-file", "copy-static", "serve")
+
+
+def parse_args(argv=None):
+    """Parse the command line. A command line not starting with a command
+    builds the site, so `main.py BASEPATH [options]` works as it always has.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv.insert(0, "build")
+    parser = argparse.ArgumentParser(description="Generate the static site or render single pages.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    build_parser = commands.add_parser("build", help="generate the static site (the default command)", description="Generate the static site.")
+    add_build_arguments(build_parser)
+    build_parser.set_defaults(run=build_site)
+
+    render_parser = commands.add_parser(
+        "render-file",
+        help="render one Markdown file to standard output",
+        description="Render one Markdown file with the template its page would get in a build.",
+    )
+    render_parser.add_argument("source", help="Markdown file to render")
+    render_parser.add_argument("basepath", nargs="?", default="/")
+    render_parser.add_argument("--template", help="template to render with instead of the layout or default template of the page")
+    render_parser.add_argument("--fragment", action="store_true", help="only output the converted content, without a template")
+    render_parser.add_argument("-o", "--output", metavar="FILE", help="write the page to FILE instead, leaving FILE untouched if it already holds it")
+    render_parser.set_defaults(run=render_file)
+
+    copy_parser = commands.add_parser(
+        "copy-static",
+        help="copy the static files to the public directory",
+        description="Copy the static files to the public directory.",
+    )
+    copy_parser.add_argument("--incremental", action="store_true", help="only copy static files that changed and remove the outputs of deleted ones")
+    copy_parser.add_argument("--link-static", action="store_true", help="with --incremental, hard link static files instead of copying them")
+    copy_parser.add_argument("--checksum", action="store_true", help="with --incremental, compare static files by content hash instead of size and mtime")
+    copy_parser.set_defaults(run=copy_static)
+
+    # Handled by main before parsing, see server.py for the options.
+    commands.add_parser("serve", help="serve Markdown to HTML rendering over HTTP, see serve --help", add_help=False)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        check_build_arguments(build_parser, args)
+    return args
+
+
+def add_build_arguments(parser):
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the build plan as JSON without building anything",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the public directory, only regenerate pages whose source, template or basepath changed "
+        "and only copy static files that changed",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print why each regenerated page is out of date (implies --incremental)",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="with --incremental, hard link static files into the public directory instead of copying them",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --incremental, compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to generate pages",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="read sources and write pages on N threads while rendering, for slow or networked volumes",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        metavar="N",
+        help="cache the rendered HTML of up to N distinct blocks so repeated blocks are parsed once",
+    )
+    parser.add_argument(
+        "--block-cache-file",
+        metavar="FILE",
+        help="load the block cache from FILE before building and save it afterwards (implies --block-cache 4096)",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="only generate the I-th of N size-balanced subsets of the pages, into ./shards/I",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="assemble the public directory from the static files and every shard in ./shards, "
+        "failing if shards produce the same file or a page is missing",
+    )
+    parser.add_argument(
+        "--artifact-store",
+        metavar="DIR",
+        help="fetch pages rendered from identical inputs from DIR instead of rendering them, "
+        "and add newly rendered pages to it; DIR may be shared between machines",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="flush every written page to disk before renaming it into place",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep running and rebuild the outputs affected by each change",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record per-stage timings and report them with the slowest pages",
+    )
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to report")
+    parser.add_argument("--profile-out", metavar="FILE", help="also dump cProfile stats of the build to FILE")
+    parser.add_argument("--trace", metavar="FILE", help="also write a Chrome trace-event JSON of the stages to FILE")
+
+
+def check_build_arguments(parser, args):
+    if args.explain:
+        args.incremental = True
+    if args.shard:
+        from shard import parse_shard
+
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.incremental or args.watch or args.merge_shards:
+            parser.error("--shard cannot be combined with --incremental, --explain, --watch or --merge-shards")
+    if args.profile_out or args.trace:
+        args.profile = True
+    if args.block_cache_file and args.block_cache is None:
+        args.block_cache = 4096
+    if args.profile and args.jobs > 1:
+        print("Profiling runs in a single process, ignoring --jobs")
+        args.jobs = 1
+    if args.profile and args.io_threads > 0:
+        print("Profiling runs on a single thread, ignoring --io-threads")
+        args.io_threads = 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["serve"]:
+        import server
+
+        server.main(argv[1:])
+        return
+    args = parse_args(argv)
+    args.run(args)
+
+
+def build_site(args):
+    from plan import build_plan, dump_plan
 
+    plan = build_plan(dir_path_content, dir_path_static, dir_path_public)
+    if args.dry_run:
+        dump_plan(plan, sys.stdout)
+        print()
+        return
 
-def main():
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+    import output
+    import profiling
+    from api import build, build_shard, merge_shards
+
+    output.fsync_outputs = args.fsync
+    config = build_config(args)
+    if args.merge_shards:
+        try:
+            with os.scandir(dir_path_shards) as entries:
+                shard_dir_paths = sorted(entry.path for entry in entries if entry.is_dir())
+        except OSError as e:
+            print(f"cannot merge shards: {e}")
+            sys.exit(1)
+        try:
+            merge_shards(config, shard_dir_paths, plan)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        return
+
+    cache = None
+    if args.block_cache or args.block_cache_file:
+        from blockcache import BlockCache
+
+        if args.block_cache_file:
+            cache = BlockCache.load(args.block_cache_file, args.block_cache)
+        else:
+            cache = BlockCache(args.block_cache)
+
+    store = None
+    if args.artifact_store:
+        from artifacts import LocalDirectoryStore
+
+        store = LocalDirectoryStore(args.artifact_store)
+
+    if args.profile:
+        profiling.active = profiling.Profiler(trace=args.trace is not None)
+    profiler = None
+    if args.profile_out:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if args.shard:
+        index, count = args.shard
+        failures = build_shard(config, index, count, os.path.join(dir_path_shards, str(index)), plan, cache, store)
+    else:
+        failures = build(config, plan, cache, store)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_out)
+    if args.profile:
+        print(profiling.active.report(args.profile_top))
+        if args.trace:
+            profiling.active.write_trace(args.trace)
+        profiling.active = None
+    if store is not None and args.jobs <= 1:
+        print(store.stats())
+    if cache is not None:
+        print(cache.stats())
+        if args.block_cache_file:
+            cache.save(args.block_cache_file)
+
+    if failures:
+        print(f"{len(failures)} pages failed to generate")
+        sys.exit(1)
+
+    if args.watch:
+        from api import page_templates
+        from watch import SiteWatcher
+
+        templates = page_templates(config)
+        watcher = SiteWatcher(
+            dir_path_content, dir_path_static, templates, dir_path_public, args.basepath, cache, args.link_static, args.checksum
+        )
+        watcher.run()
+
+
+def render_file(args):
+    from markdown_blocks import markdown_to_html_node
+    from page import render_page
+    from template import Layouts, load_template, page_template_path
+
+    try:
+        with open(args.source, encoding="utf-8") as f:
+            markdown = f.read()
+        if args.fragment:
+            html = markdown_to_html_node(markdown, args.basepath).to_html()
+        else:
+            template = args.template
+            if template is None:
+                templates = Layouts(dir_path_layouts, dir_path_content, template_path) if os.path.isdir(dir_path_layouts) else template_path
+                template = page_template_path(templates, args.source)
+            html = render_page(markdown, load_template(template, args.basepath), args.basepath)
+    except (OSError, ValueError) as e:
+        print(f"{args.source}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        import output
+
+        output.write_if_changed(args.output, html)
+    else:
+        sys.stdout.write(html)
+
+
+def copy_static(args):
+    from copystatic import copy_files_recursive, sync_files_recursive
 
     print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    if args.incremental:
+        sync_files_recursive(dir_path_static, dir_path_public, manifest_path, args.link_static, args.checksum)
+    else:
+        copy_files_recursive(dir_path_static, dir_path_public)
+
+
+def build_config(args):
+    from api import BuildConfig
 
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    return BuildConfig(
+        basepath=args.basepath,
+        content=dir_path_content,
+        static=dir_path_static,
+        dest=dir_path_public,
+        template=template_path,
+        manifest=manifest_path,
+        incremental=args.incremental,
+        link_static=args.link_static,
+        checksum=args.checksum,
+        jobs=args.jobs,
+        io_threads=args.io_threads,
+        explain=args.explain,
+        layouts=dir_path_layouts,
+    )
 
 
-main()
+if __name__ == "__main__":
+    main()
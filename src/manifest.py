@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Records, for every generated page, the hashes of the inputs it was
+    built from so that unchanged pages can be skipped on the next build.
+
+    A page's inputs are its source, its template and every partial the
+    template includes; together with the basepath they form the page's
+    dependencies.
+    """
+
+    def __init__(self, path, pages=None, static=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        # Static outputs copied into the public directory, mapped to their
+        # source, so that files whose source was deleted can be removed.
+        self.static = static if static is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}), data.get("static", {}))
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.pages, "static": self.static}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self, dest_path, inputs, basepath):
+        return bool(self.stale_reasons(dest_path, inputs, basepath))
+
+    def stale_reasons(self, dest_path, inputs, basepath):
+        """Explain why the page must be rebuilt; empty if it is up to date."""
+        entry = self.pages.get(dest_path)
+        if entry is None:
+            return ["not built before"]
+        reasons = []
+        if not os.path.exists(dest_path):
+            reasons.append("output missing")
+        recorded = entry["inputs"]
+        for path in inputs:
+            if path not in recorded:
+                reasons.append(f"new dependency {path}")
+            elif recorded[path] != inputs[path]:
+                reasons.append(f"{path} changed")
+        for path in recorded:
+            if path not in inputs:
+                reasons.append(f"no longer depends on {path}")
+        if entry["basepath"] != basepath:
+            reasons.append(f"basepath changed from {entry['basepath']} to {basepath}")
+        return reasons
+
+    def record(self, dest_path, source, inputs, basepath):
+        self.pages[dest_path] = {"source": source, "inputs": inputs, "basepath": basepath}
+
+    def prune(self, live_dest_paths, root):
+        removed = []
+        for dest_path in sorted(self.pages):
+            if dest_path in live_dest_paths:
+                continue
+            del self.pages[dest_path]
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                remove_empty_dirs(os.path.dirname(dest_path), root)
+            removed.append(dest_path)
+        return removed
+
+
+def remove_manifest(path):
+    """Forget every recorded build, for builds that rewrite the outputs
+    without recording what they wrote."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_empty_dirs(dir_path, root):
+    root = os.path.normpath(root)
+    dir_path = os.path.normpath(dir_path)
+    while dir_path != root and dir_path.startswith(root + os.sep):
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            return
+        dir_path = os.path.dirname(dir_path)
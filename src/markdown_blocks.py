@@ -1,9 +1,15 @@
+import re
 from enum import Enum
 
+import profiling
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 
+# Bump whenever a change to the renderer changes the HTML it produces, so
+# caches of rendered output are invalidated.
+RENDERER_VERSION = "1"
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -25,7 +31,85 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
+def iter_markdown_blocks(lines):
+    """Yield the blocks markdown_to_blocks would return, reading from an
+    iterable of newline-terminated lines such as an open text file.
+
+    Only the lines of the block being collected are held in memory.
+    """
+    pending = []
+    for line in lines:
+        if line == "\n" and pending and pending[-1].endswith("\n"):
+            block = "".join(pending)[:-1]
+            pending = []
+            if block != "":
+                yield block.strip()
+            continue
+        pending.append(line)
+    block = "".join(pending)
+    if block != "":
+        yield block.strip()
+
+
+def iter_chunk_blocks(chunks, encoding="utf-8"):
+    """Yield the blocks markdown_to_blocks would return for the decoded
+    concatenation of chunks, an iterable of bytes such as a file read in
+    pieces.
+
+    Block boundaries are found in the raw bytes and each block is decoded
+    only when it is complete, so only the block being read is held in
+    memory. The chunks must use "\n" line endings.
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        while (boundary := pending.find(b"\n\n", start)) != -1:
+            if boundary > start:
+                yield pending[start:boundary].decode(encoding).strip()
+            start = boundary + 2
+        del pending[:start]
+    if pending:
+        yield pending.decode(encoding).strip()
+
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+# A line break not followed by the marker every line of the block needs.
+QUOTE_BREAK_PATTERN = re.compile(r"\n(?!>)")
+ULIST_BREAK_PATTERN = re.compile(r"\n(?!- )")
+# "1. ", "2. ", ... extended on demand by _olist_prefixes.
+_OLIST_PREFIXES = ["", "1. "]
+
+
 def block_to_block_type(block):
+    """Single-scan equivalent of block_to_block_type_reference."""
+    if block.startswith(HEADING_PREFIXES):
+        return BlockType.HEADING
+    first = block[:1]
+    if first == "`":
+        last_line = block.rfind("\n") + 1
+        if last_line and block.startswith("```") and block.startswith("```", last_line):
+            return BlockType.CODE
+    elif first == ">":
+        if QUOTE_BREAK_PATTERN.search(block) is None:
+            return BlockType.QUOTE
+    elif first == "-":
+        if block.startswith("- ") and ULIST_BREAK_PATTERN.search(block) is None:
+            return BlockType.ULIST
+    elif first == "1" and block.startswith("1. "):
+        lines = block.split("\n")
+        if all(map(str.startswith, lines, _olist_prefixes(len(lines)))):
+            return BlockType.OLIST
+    return BlockType.PARAGRAPH
+
+
+def _olist_prefixes(count):
+    while len(_OLIST_PREFIXES) <= count:
+        _OLIST_PREFIXES.append(f"{len(_OLIST_PREFIXES)}. ")
+    return _OLIST_PREFIXES[1 : count + 1]
+
+
+def block_to_block_type_reference(block):
     lines = block.split("\n")
 
     if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
@@ -52,49 +136,57 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, basepath="/", cache=None):
+    render_block = block_to_html_node if cache is None else cache.block_to_html_node
     blocks = markdown_to_blocks(markdown)
     children = []
     for block in blocks:
-        html_node = block_to_html_node(block)
+        html_node = render_block(block, basepath)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
+def iter_block_html_nodes(lines, basepath="/", cache=None):
+    render_block = block_to_html_node if cache is None else cache.block_to_html_node
+    for block in iter_markdown_blocks(lines):
+        yield render_block(block, basepath)
+
+
+def block_to_html_node(block, basepath="/"):
     block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(block, basepath)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(block, basepath)
     if block_type == BlockType.CODE:
         return code_to_html_node(block)
     if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(block, basepath)
     if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(block, basepath)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, basepath)
     raise ValueError("invalid block type")
 
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+def text_to_children(text, basepath="/"):
+    with profiling.stage("inline"):
+        text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, basepath)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, basepath="/"):
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, basepath)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, basepath="/"):
     level = 0
     for char in block:
         if char == "#":
@@ -104,7 +196,7 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
+    children = text_to_children(text, basepath)
     return ParentNode(f"h{level}", children)
 
 
@@ -118,27 +210,27 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
+def olist_to_html_node(block, basepath="/"):
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
+def ulist_to_html_node(block, basepath="/"):
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, basepath="/"):
     lines = block.split("\n")
     new_lines = []
     for line in lines:
@@ -146,5 +238,5 @@ def quote_to_html_node(block):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, basepath)
     return ParentNode("blockquote", children)
@@ -0,0 +1,118 @@
+import os
+
+# Whether outputs are flushed to disk before being renamed into place, unless
+# an AtomicOutput says otherwise.
+fsync_outputs = False
+
+COPY_CHUNK_SIZE = 1 << 16
+
+
+class AtomicOutput:
+    """A text file written to a temporary path next to its destination and
+    renamed into place when closed, so readers never see a partial page.
+
+    If the destination already holds the same bytes it is left untouched,
+    keeping its mtime, so rsync, uploads and ETags only see real changes.
+    `changed` tells which happened. Text is written as UTF-8.
+
+    Written chunks are compared with the destination as they arrive; the
+    temporary file is only created at the first difference, starting with a
+    copy of the prefix that matched, so unchanged pages cost reads only.
+    """
+
+    def __init__(self, path, fsync=None):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.fsync = fsync_outputs if fsync is None else fsync
+        self.changed = None
+        self._existing = None
+        self._matched = 0
+        self._file = None
+
+    def __enter__(self):
+        try:
+            self._existing = open(self.path, "rb")
+        except OSError:
+            self._file = open(self.tmp_path, "wb")
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self._close_existing()
+            if self._file is not None:
+                self._file.close()
+                os.remove(self.tmp_path)
+            return False
+        if self._file is None and self._existing.read(1) == b"":
+            self.changed = False
+            self._close_existing()
+            return False
+        if self._file is None:
+            # Every chunk matched, but the destination is longer.
+            self._diverge()
+        self.changed = True
+        if self.fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        if self.fsync:
+            sync_dir(os.path.dirname(self.path))
+        return False
+
+    def write(self, text):
+        self.write_bytes(text.encode("utf-8"))
+
+    def write_bytes(self, data):
+        if self._file is None:
+            if self._existing.read(len(data)) == data:
+                self._matched += len(data)
+                return
+            self._diverge()
+        self._file.write(data)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def _diverge(self):
+        """Start the temporary file with the prefix of the destination that
+        matched so far."""
+        self._file = open(self.tmp_path, "wb")
+        try:
+            self._existing.seek(0)
+            remaining = self._matched
+            while remaining:
+                chunk = self._existing.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    raise OSError(f"{self.path} shrank while being compared")
+                self._file.write(chunk)
+                remaining -= len(chunk)
+        except BaseException:
+            self._file.close()
+            os.remove(self.tmp_path)
+            self._file = None
+            raise
+        finally:
+            self._close_existing()
+
+    def _close_existing(self):
+        if self._existing is not None:
+            self._existing.close()
+            self._existing = None
+
+
+def write_if_changed(path, text, fsync=None):
+    """Atomically replace path with text unless it already holds it. Returns
+    whether the file was written."""
+    with AtomicOutput(path, fsync) as output:
+        output.write(text)
+    return output.changed
+
+
+def sync_dir(dir_path):
+    fd = os.open(dir_path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,18 @@
+from markdown_blocks import markdown_to_html_node
+
+
+def render_page(markdown, template, basepath, cache=None):
+    title = extract_title(markdown)
+    node = markdown_to_html_node(markdown, basepath, cache)
+    return template.render({"Title": title, "Content": node.iter_html})
+
+
+def extract_title(md):
+    return extract_title_from_lines(md.split("\n"))
+
+
+def extract_title_from_lines(lines):
+    for line in lines:
+        if line.startswith("# "):
+            return line[2:].removesuffix("\n")
+    raise ValueError("no title found")
@@ -0,0 +1,53 @@
+from collections import deque
+
+
+def run_pipeline(jobs, read, render, write, io_threads=4, max_pending=32):
+    """Run read(job) -> render(job, data) -> write(job, output) for every job,
+    overlapping the I/O of some jobs with the rendering of others.
+
+    Reads and writes run on their own pools of io_threads threads while
+    render runs in the calling thread. At most max_pending reads are queued
+    ahead of the renderer and at most max_pending rendered outputs wait to
+    be written, which bounds memory. A job that fails at any stage is
+    skipped; failures are returned as (job, exception) pairs in job order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    failures = []
+    pending_jobs = enumerate(jobs)
+    with ThreadPoolExecutor(io_threads) as readers, ThreadPoolExecutor(io_threads) as writers:
+        reads = deque()
+        writes = deque()
+
+        def fill_reads():
+            while len(reads) < max_pending:
+                item = next(pending_jobs, None)
+                if item is None:
+                    return
+                index, job = item
+                reads.append((index, job, readers.submit(read, job)))
+
+        def finish_write():
+            index, job, future = writes.popleft()
+            try:
+                future.result()
+            except Exception as e:
+                failures.append((index, job, e))
+
+        fill_reads()
+        while reads:
+            index, job, future = reads.popleft()
+            fill_reads()
+            try:
+                output = render(job, future.result())
+            except Exception as e:
+                failures.append((index, job, e))
+                continue
+            writes.append((index, job, writers.submit(write, job, output)))
+            while writes and (len(writes) > max_pending or writes[0][2].done()):
+                finish_write()
+        while writes:
+            finish_write()
+
+    failures.sort(key=lambda failure: failure[0])
+    return [(job, e) for _, job, e in failures]
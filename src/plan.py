@@ -0,0 +1,64 @@
+import json
+import os
+from collections import namedtuple
+
+PAGE = "page"
+STATIC = "static"
+
+Job = namedtuple("Job", ["source", "destination", "kind"])
+
+
+def scan_files(root):
+    """Yield the path of every file under root in sorted, depth-first order.
+
+    Uses os.scandir so entry types come from the directory listing itself
+    instead of an extra stat call per entry.
+    """
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_file():
+            yield entry.path
+        elif entry.is_dir():
+            yield from scan_files(entry.path)
+
+
+def static_destination(source, dir_path_static, dest_dir_path):
+    return os.path.join(dest_dir_path, os.path.relpath(source, dir_path_static))
+
+
+def page_destination(source, dir_path_content, dest_dir_path):
+    destination = os.path.join(dest_dir_path, os.path.relpath(source, dir_path_content))
+    return os.path.splitext(destination)[0] + ".html"
+
+
+def plan_static(dir_path_static, dest_dir_path):
+    return [
+        Job(source, static_destination(source, dir_path_static, dest_dir_path), STATIC)
+        for source in scan_files(dir_path_static)
+    ]
+
+
+def plan_pages(dir_path_content, dest_dir_path):
+    return [
+        Job(source, page_destination(source, dir_path_content, dest_dir_path), PAGE)
+        for source in scan_files(dir_path_content)
+    ]
+
+
+def build_plan(dir_path_content, dir_path_static, dest_dir_path):
+    """Walk static/ and content/ once and return every build job, static
+    copies first, each group sorted by source path."""
+    return plan_static(dir_path_static, dest_dir_path) + plan_pages(dir_path_content, dest_dir_path)
+
+
+def jobs_of_kind(plan, kind):
+    return [(job.source, job.destination) for job in plan if job.kind == kind]
+
+
+def dump_plan(plan, fp):
+    json.dump([job._asdict() for job in plan], fp, indent=1)
+
+
+def load_plan(fp):
+    return [Job(**job) for job in json.load(fp)]
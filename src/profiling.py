@@ -0,0 +1,152 @@
+import contextlib
+import json
+import os
+import time
+
+# The profiler of the running build, if any. Instrumented code goes through
+# the helpers below, which are no-ops while this is None.
+active = None
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Profiler:
+    """Records wall time and call counts per build stage, both per page and in
+    total.
+
+    Stages nest (reading happens while blocks are being split, inline parsing
+    while blocks are being rendered, and so on), so each stage is charged its
+    exclusive time: time spent in a nested stage is not counted again for the
+    stage that contains it.
+    """
+
+    def __init__(self, trace=False):
+        self.stats = {}
+        self.trace_events = [] if trace else None
+        self.page_name = None
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def page(self, name):
+        previous, self.page_name = self.page_name, name
+        try:
+            with self.stage("other"):
+                yield
+        finally:
+            self.page_name = previous
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        self._stack.append([name, now, now])
+
+    def exit(self):
+        now = time.perf_counter()
+        frame = self._stack.pop()
+        self._charge(frame, now, call=True)
+        if self._stack:
+            self._stack[-1][2] = now
+        if self.trace_events is not None:
+            name, started, _ = frame
+            self.trace_events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (started - self._origin) * 1e6,
+                    "dur": (now - started) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": 0,
+                    "args": {"page": self.page_name},
+                }
+            )
+
+    def _charge(self, frame, now, call=False):
+        entry = self.stats.setdefault((self.page_name, frame[0]), [0.0, 0])
+        entry[0] += now - frame[2]
+        if call:
+            entry[1] += 1
+
+    def totals(self):
+        totals = {}
+        for (_, stage), (seconds, calls) in self.stats.items():
+            entry = totals.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+        return totals
+
+    def page_times(self):
+        times = {}
+        for (page, _), (seconds, _) in self.stats.items():
+            if page is not None:
+                times[page] = times.get(page, 0.0) + seconds
+        return times
+
+    def report(self, top=10):
+        lines = ["Stage                 seconds      calls"]
+        for stage, (seconds, calls) in sorted(self.totals().items(), key=lambda item: -item[1][0]):
+            lines.append(f"{stage:<16} {seconds:12.4f} {calls:10d}")
+        slowest = sorted(self.page_times().items(), key=lambda item: -item[1])[:top]
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} pages:")
+            for page, seconds in slowest:
+                stages = ", ".join(
+                    f"{stage} {self.stats[(page, stage)][0] * 1000:.2f} ms"
+                    for stage in sorted(self.totals())
+                    if (page, stage) in self.stats
+                )
+                lines.append(f"  {seconds * 1000:10.2f} ms  {page}  ({stages})")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events or [], "displayTimeUnit": "ms"}, f)
+
+
+def stage(name):
+    if active is None:
+        return _NULL_CONTEXT
+    return active.stage(name)
+
+
+def page(name):
+    if active is None:
+        return _NULL_CONTEXT
+    return active.page(name)
+
+
+def timed(name, iterable):
+    """Charge the time spent producing each item of iterable to a stage."""
+    if active is None:
+        return iterable
+    return _timed(active, name, iter(iterable))
+
+
+def _timed(profiler, name, iterator):
+    while True:
+        profiler.enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            profiler.exit()
+        yield item
+
+
+def write_chunks(fp, chunks):
+    if active is None:
+        fp.writelines(chunks)
+        return
+    for chunk in chunks:
+        with active.stage("write"):
+            fp.write(chunk)
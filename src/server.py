@@ -0,0 +1,140 @@
+import argparse
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from markdown_blocks import markdown_to_html_node
+from page import render_page
+from template import load_template
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """Renders the Markdown in the request body.
+
+    POST /render returns the full page built from the server's template and
+    POST /fragment only the converted content. The basepath defaults to the
+    server's and can be overridden with a ?basepath= query parameter.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "md-to-html"
+
+    def setup(self):
+        # Headers and body are written separately; on TCP, Nagle's algorithm
+        # would delay each response on keep-alive connections.
+        self.disable_nagle_algorithm = isinstance(self.client_address, tuple)
+        super().setup()
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/health":
+            self.respond(200, "ok\n", "text/plain")
+        else:
+            self.respond(404, "not found\n", "text/plain")
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # Where the body ends is unknown, so the connection cannot be reused.
+            self.close_connection = True
+            self.respond(400, "invalid Content-Length\n", "text/plain")
+            return
+        # Always consume the body so the connection can be reused.
+        body = self.rfile.read(length)
+        url = urlsplit(self.path)
+        if url.path not in ("/render", "/fragment"):
+            self.respond(404, "not found\n", "text/plain")
+            return
+        basepath = parse_qs(url.query).get("basepath", [self.server.basepath])[0]
+        try:
+            markdown = body.decode("utf-8")
+            if url.path == "/render":
+                template = load_template(self.server.template_path, basepath)
+                html = render_page(markdown, template, basepath)
+            else:
+                html = markdown_to_html_node(markdown, basepath).to_html()
+        except ValueError as e:
+            self.respond(400, f"{e}\n", "text/plain")
+            return
+        self.respond(200, html, "text/html")
+
+    def respond(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address.
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class RenderServer(ThreadingHTTPServer):
+    def __init__(self, address, template_path, basepath="/", quiet=False):
+        self.template_path = template_path
+        self.basepath = basepath
+        self.quiet = quiet
+        super().__init__(address, RenderHandler)
+
+
+class UnixRenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, template_path, basepath="/", quiet=False):
+        self.template_path = template_path
+        self.basepath = basepath
+        self.quiet = quiet
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, RenderHandler)
+
+
+def make_server(template_path, basepath="/", host="127.0.0.1", port=8000, socket_path=None, quiet=False):
+    """Create a render server with the template compiled up front, listening
+    on a Unix socket when socket_path is given and on host:port otherwise."""
+    load_template(template_path, basepath)
+    if socket_path is not None:
+        return UnixRenderServer(socket_path, template_path, basepath, quiet)
+    return RenderServer((host, port), template_path, basepath, quiet)
+
+
+def serve_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Markdown to HTML rendering over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", dest="socket_path", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--template", dest="template_path", default="./template.html")
+    parser.add_argument("--basepath", default="/")
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.template_path, args.basepath, args.host, args.port, args.socket_path, args.quiet)
+    print(f"Serving on {args.socket_path or f'http://{args.host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
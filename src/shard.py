@@ -0,0 +1,110 @@
+import heapq
+import json
+import os
+
+from markdown_blocks import RENDERER_VERSION
+from plan import scan_files
+
+# Written into every shard directory by build_shard, so that merging can tell
+# how each shard was built.
+SHARD_STAMP = ".shard.json"
+
+
+def parse_shard(spec):
+    """Parse "I/N", the I-th of N shards counting from 1."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {spec!r}, expected I/N") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard {spec!r}, I must be between 1 and N")
+    return index, count
+
+
+def partition_pages(pages, count):
+    """Split (from_path, dest_path) pairs into count shards of roughly equal
+    total source size.
+
+    Pages are assigned largest first, each to the shard with the least bytes
+    so far (longest-processing-time scheduling). Ties are broken by path and
+    shard number, so every machine computes the same partition.
+    """
+    sized = sorted(((os.path.getsize(page[0]), page) for page in pages), key=lambda item: (-item[0], item[1]))
+    loads = [(0, shard) for shard in range(count)]
+    shards = [[] for _ in range(count)]
+    for size, page in sized:
+        load, shard = heapq.heappop(loads)
+        shards[shard].append(page)
+        heapq.heappush(loads, (load + size, shard))
+    return [sorted(shard) for shard in shards]
+
+
+def shard_pages(pages, index, count):
+    return partition_pages(pages, count)[index - 1]
+
+
+def write_shard_stamp(shard_dir_path, basepath, index, count):
+    os.makedirs(shard_dir_path, exist_ok=True)
+    with open(os.path.join(shard_dir_path, SHARD_STAMP), "w") as f:
+        json.dump({"basepath": basepath, "renderer": RENDERER_VERSION, "index": index, "count": count}, f)
+
+
+def read_shard_stamp(shard_dir_path):
+    try:
+        with open(os.path.join(shard_dir_path, SHARD_STAMP)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return stamp if isinstance(stamp, dict) else None
+
+
+def check_shard_stamps(shard_dir_paths, basepath):
+    """Describe every way the shards differ from a build of basepath with
+    this renderer, or from each other; empty if they can be merged."""
+    problems = []
+    counts = set()
+    for shard_dir_path in shard_dir_paths:
+        stamp = read_shard_stamp(shard_dir_path)
+        if stamp is None:
+            problems.append(f"{shard_dir_path} has no readable {SHARD_STAMP}, it was not built by build_shard")
+            continue
+        if stamp.get("basepath") != basepath:
+            problems.append(f"{shard_dir_path} was built for basepath {stamp.get('basepath')}, not {basepath}")
+        if stamp.get("renderer") != RENDERER_VERSION:
+            problems.append(f"{shard_dir_path} was built by renderer version {stamp.get('renderer')}, not {RENDERER_VERSION}")
+        counts.add(stamp.get("count"))
+    if len(counts) > 1:
+        problems.append(f"shards were built as parts of different shard counts: {sorted(counts, key=str)}")
+    return problems
+
+
+def collect_shard_outputs(shard_dir_paths, dest_dir_path, static_files, page_dest_paths, basepath):
+    """Map every file built by the shards to its place under dest_dir_path
+    and return the (from_path, dest_path) pairs.
+
+    Raises ValueError if a shard was built for another basepath or renderer
+    version, if two shards, or a shard and a static file, produce the same
+    output, or if a page in page_dest_paths was not built by any shard.
+    """
+    problems = check_shard_stamps(shard_dir_paths, basepath)
+    owners = {os.path.normpath(dest_path): from_path for from_path, dest_path in static_files}
+    outputs = []
+    collisions = []
+    for shard_dir_path in shard_dir_paths:
+        for from_path in scan_files(shard_dir_path):
+            relative_path = os.path.relpath(from_path, shard_dir_path)
+            if relative_path == SHARD_STAMP:
+                continue
+            dest_path = os.path.join(dest_dir_path, relative_path)
+            dest_key = os.path.normpath(dest_path)
+            if dest_key in owners:
+                collisions.append(f"{dest_path} built from both {owners[dest_key]} and {from_path}")
+                continue
+            owners[dest_key] = from_path
+            outputs.append((from_path, dest_path))
+
+    missing = sorted({os.path.normpath(dest_path) for dest_path in page_dest_paths} - set(owners))
+    problems += collisions + [f"{dest_path} not built by any shard" for dest_path in missing]
+    if problems:
+        raise ValueError("cannot merge shards:\n  " + "\n  ".join(problems))
+    return outputs
@@ -0,0 +1,232 @@
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from plan import scan_files
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+INCLUDE_PATTERN = re.compile(r"\{\{> ([^\s{}]+) \}\}")
+EXTENDS_PATTERN = re.compile(r"\A\s*\{% extends (\S+) %\}")
+BLOCK_PATTERN = re.compile(r"\{% block (\w+) %\}(.*?)\{% endblock %\}", re.DOTALL)
+
+
+class Template:
+    """A page template compiled into static fragments and named slots.
+
+    Rendering walks the fragments once, so a page is produced with a single
+    join and the template text is never rescanned. Root-relative href and src
+    attributes in the static fragments are rewritten for the basepath at
+    compile time.
+
+    {{> path }} includes the partial template at path, and a template
+    starting with {% extends path %} is its parent layout with the child's
+    {% block name %}...{% endblock %} sections replacing the parent's blocks
+    of the same name. Both paths are relative to the file using them.
+    `dependencies` lists the template file and every partial and layout it
+    pulls in, which is what a page built from it depends on, and `digest`
+    identifies the expanded template text. `hashes` and `stamps` hold the
+    sha256 and the (mtime_ns, size) of each file as it was read.
+    """
+
+    def __init__(self, text, basepath="/", path=None, files=None):
+        self.dependencies = [] if path is None else [path]
+        files = {} if files is None else files
+        text = expand_layout(text, path, self.dependencies, files)
+        self.hashes = {path: digest for path, (digest, _) in files.items()}
+        self.stamps = {path: stamp for path, (_, stamp) in files.items()}
+        self.digest = hashlib.sha256(text.encode()).hexdigest()
+        self.fragments = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.fragments.append(rewrite_basepath(text[position : match.start()], basepath))
+            self.slots.append((match.group(1), match.group()))
+            position = match.end()
+        self.fragments.append(rewrite_basepath(text[position:], basepath))
+
+    def iter_render(self, values):
+        """Yield the page in chunks. A slot value is either a string or a
+        callable returning an iterable of strings, which is called once per
+        occurrence of the slot. Placeholders without a value are kept as is."""
+        yield self.fragments[0]
+        for (name, placeholder), fragment in zip(self.slots, self.fragments[1:]):
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value()
+            yield fragment
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def is_current(self):
+        """Whether none of the files the template was read from changed."""
+        return all(file_stamp(path) == stamp for path, stamp in self.stamps.items())
+
+
+class TemplateCache:
+    """Size-bounded LRU cache of compiled templates by path and basepath.
+
+    A cached template is compiled again once any file it was read from has
+    changed, so long-running processes pick up edited templates.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, template_path, basepath="/"):
+        key = (template_path, basepath)
+        with self.lock:
+            template = self.entries.get(key)
+        if template is None or not template.is_current():
+            files = {}
+            template = Template(read_template_file(template_path, files), basepath, template_path, files)
+        with self.lock:
+            self.entries[key] = template
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Bounded, as the render server compiles one template per basepath its clients
+# ask for. The bound leaves room for every layout of a site at a few basepaths.
+templates = TemplateCache(maxsize=256)
+
+
+def load_template(template_path, basepath="/"):
+    return templates.load(template_path, basepath)
+
+
+def read_template_file(path, files):
+    """Read a template file as open(path, "r") would, recording the hash and
+    stamp of the bytes read in files."""
+    with open(path, "rb") as f:
+        # Stamped before reading, so a write racing the read is seen as a
+        # change on the next check.
+        stamp = file_stamp(f.fileno())
+        data = f.read()
+    files[path] = (hashlib.sha256(data).hexdigest(), stamp)
+    return io.TextIOWrapper(io.BytesIO(data)).read()
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Layouts:
+    """Selects the template of each page by its directory.
+
+    layouts/<dir>.html is the template of every page under content/<dir>/,
+    the deepest match winning; other pages use the default template. Layout
+    files whose name starts with "_" are never selected, only extended.
+    """
+
+    def __init__(self, dir_path_layouts, dir_path_content, default):
+        self.dir_path_layouts = dir_path_layouts
+        self.dir_path_content = dir_path_content
+        self.default = default
+        self.scan()
+
+    def scan(self):
+        """Pick up layout files added or removed since the last scan."""
+        self.by_dir = {}
+        if not os.path.isdir(self.dir_path_layouts):
+            return
+        for path in scan_files(self.dir_path_layouts):
+            name, extension = os.path.splitext(os.path.relpath(path, self.dir_path_layouts))
+            if extension == ".html" and not os.path.basename(name).startswith("_"):
+                self.by_dir[os.path.normpath(name)] = path
+
+    def __repr__(self):
+        return f"Layouts({self.default!r}, {self.by_dir!r})"
+
+    def template_path(self, from_path):
+        dir_path = os.path.relpath(os.path.dirname(from_path), self.dir_path_content)
+        while dir_path not in ("", ".", os.pardir):
+            if dir_path in self.by_dir:
+                return self.by_dir[dir_path]
+            dir_path = os.path.dirname(dir_path)
+        return self.default
+
+    def paths(self):
+        return [self.default, *sorted(self.by_dir.values())]
+
+
+def page_template_path(template_path, from_path):
+    """The template of a page, where template_path is either a path or a
+    Layouts selecting one per page."""
+    if isinstance(template_path, Layouts):
+        return template_path.template_path(from_path)
+    return template_path
+
+
+def template_paths(template_path):
+    if isinstance(template_path, Layouts):
+        return template_path.paths()
+    return [template_path]
+
+
+def expand_layout(text, path, dependencies, files, blocks=None, stack=()):
+    """Expand the includes of a template and resolve its parent layouts,
+    appending every file read to dependencies and recording it in files."""
+    text = expand_includes(text, path, dependencies, files)
+    own_blocks = {match.group(1): match.group(2) for match in BLOCK_PATTERN.finditer(text)}
+    # Blocks defined further down the chain override this template's own.
+    blocks = own_blocks if blocks is None else {**own_blocks, **blocks}
+    match = EXTENDS_PATTERN.match(text)
+    if match is None:
+        return BLOCK_PATTERN.sub(lambda block: blocks[block.group(1)], text)
+
+    dir_path = ""
+    if path is not None:
+        dir_path = os.path.dirname(path)
+        stack += (os.path.normpath(path),)
+    parent_path = os.path.normpath(os.path.join(dir_path, match.group(1)))
+    if parent_path in stack:
+        raise ValueError(f"template extends cycle: {' -> '.join(stack + (parent_path,))}")
+    parent = read_template_file(parent_path, files)
+    if parent_path not in dependencies:
+        dependencies.append(parent_path)
+    return expand_layout(parent, parent_path, dependencies, files, blocks, stack)
+
+
+def expand_includes(text, path, dependencies, files, stack=()):
+    """Replace every include in text, recursively, appending each partial
+    read to dependencies and recording it in files."""
+    dir_path = ""
+    if path is not None:
+        dir_path = os.path.dirname(path)
+        stack += (os.path.normpath(path),)
+
+    def include(match):
+        partial_path = os.path.normpath(os.path.join(dir_path, match.group(1)))
+        if partial_path in stack:
+            raise ValueError(f"template include cycle: {' -> '.join(stack + (partial_path,))}")
+        partial = read_template_file(partial_path, files)
+        if partial_path not in dependencies:
+            dependencies.append(partial_path)
+        return expand_includes(partial, partial_path, dependencies, files, stack)
+
+    return INCLUDE_PATTERN.sub(include, text)
+
+
+def rewrite_basepath(html, basepath):
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
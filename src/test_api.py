@@ -0,0 +1,134 @@
+import contextlib
+import importlib
+import io
+import os
+import tempfile
+import unittest
+
+from api import BuildConfig, build, render, render_many
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_fragment(self):
+        self.assertEqual(render("[home](/)", basepath="/blog/"), '<div><p><a href="/blog/">home</a></p></div>')
+
+    def test_render_page(self):
+        self.assertEqual(
+            render("# Hi\n\ntext", self.template_path, "/blog/"),
+            '<title>Hi</title><link href="/blog/index.css"><div><h1>Hi</h1><p>text</p></div>',
+        )
+
+    def test_render_many_keeps_input_order(self):
+        documents = [f"# Page {i}\n\n**{i}**" for i in range(40)]
+        expected = [render(document, self.template_path) for document in documents]
+        self.assertEqual(list(render_many(iter(documents), template_path=self.template_path)), expected)
+        self.assertEqual(list(render_many(documents, jobs=2, template_path=self.template_path)), expected)
+
+    def test_render_many_is_lazy(self):
+        results = render_many(["# A", "no title"], template_path=self.template_path)
+        self.assertEqual(next(results), '<title>A</title><link href="/index.css"><div><h1>A</h1></div>')
+        with self.assertRaises(ValueError):
+            next(results)
+
+
+def write_site(root):
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    os.makedirs(os.path.join(content, "blog"))
+    os.makedirs(static)
+    with open(os.path.join(content, "blog", "index.md"), "w") as f:
+        f.write("# Blog\n")
+    with open(os.path.join(static, "index.css"), "w") as f:
+        f.write("body {}")
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as f:
+        f.write("{{ Content }}")
+    dest = os.path.join(root, "docs")
+    return BuildConfig(content=content, static=static, dest=dest, template=template, manifest=os.path.join(root, "manifest.json"))
+
+
+class TestBuild(unittest.TestCase):
+    def test_build_site(self):
+        with tempfile.TemporaryDirectory() as root:
+            config = write_site(root)
+            dest = config.dest
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(config), [])
+            with open(os.path.join(dest, "blog", "index.html")) as f:
+                self.assertEqual(f.read(), "<div><h1>Blog</h1></div>")
+            self.assertTrue(os.path.exists(os.path.join(dest, "index.css")))
+
+            os.utime(os.path.join(dest, "blog", "index.html"), ns=(0, 0))
+            os.makedirs(os.path.join(dest, "old"))
+            with open(os.path.join(dest, "old", "index.html"), "w") as f:
+                f.write("stale")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(config), [])
+            self.assertEqual(os.stat(os.path.join(dest, "blog", "index.html")).st_mtime_ns, 0)
+            self.assertFalse(os.path.exists(os.path.join(dest, "old")))
+
+    def test_full_build_after_linked_static_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            config = write_site(root)
+            css = os.path.join(config.dest, "index.css")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(config._replace(incremental=True, link_static=True)), [])
+                self.assertTrue(os.path.samefile(css, os.path.join(config.static, "index.css")))
+                self.assertEqual(build(config), [])
+            self.assertFalse(os.path.samefile(css, os.path.join(config.static, "index.css")))
+            with open(css) as f:
+                self.assertEqual(f.read(), "body {}")
+
+    def test_full_build_rewrites_manifest(self):
+        with tempfile.TemporaryDirectory() as root:
+            config = write_site(root)
+            with open(config.template, "w") as f:
+                f.write('<link href="/index.css">{{ Content }}')
+            page = os.path.join(config.dest, "blog", "index.html")
+            incremental = config._replace(incremental=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(incremental), [])
+                self.assertEqual(build(config._replace(basepath="/site/")), [])
+                self.assertEqual(build(incremental), [])
+            with open(page) as f:
+                self.assertEqual(f.read(), '<link href="/index.css"><div><h1>Blog</h1></div>')
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(config), [])
+            os.utime(page, ns=(0, 0))
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(build(incremental), [])
+            self.assertIn("1 unchanged pages skipped", out.getvalue())
+            self.assertIn("1 unchanged static files skipped", out.getvalue())
+            self.assertEqual(os.stat(page).st_mtime_ns, 0)
+
+    def test_edited_template_between_builds(self):
+        with tempfile.TemporaryDirectory() as root:
+            config = write_site(root)
+            page = os.path.join(config.dest, "blog", "index.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(build(config), [])
+                with open(config.template, "w") as f:
+                    f.write("<main>{{ Content }}</main>")
+                self.assertEqual(build(config), [])
+                self.assertEqual(build(config._replace(incremental=True)), [])
+            with open(page) as f:
+                self.assertEqual(f.read(), "<main><div><h1>Blog</h1></div></main>")
+
+    def test_importing_main_has_no_side_effects(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            importlib.import_module("main")
+        self.assertEqual(out.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
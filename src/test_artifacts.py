@@ -0,0 +1,69 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from artifacts import ArtifactStore, LocalDirectoryStore, artifact_key
+from gencontent import generate_pages
+from template import Template
+
+
+class TestArtifactKey(unittest.TestCase):
+    def test_depends_on_every_input(self):
+        template = Template("{{ Content }}")
+        key = artifact_key("source", template, "/")
+        self.assertEqual(key, artifact_key("source", Template("{{ Content }}"), "/"))
+        self.assertNotEqual(key, artifact_key("other", template, "/"))
+        self.assertNotEqual(key, artifact_key("source", Template("<p>{{ Content }}</p>"), "/"))
+        self.assertNotEqual(key, artifact_key("source", template, "/blog/"))
+
+
+class TestLocalDirectoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        store = LocalDirectoryStore(os.path.join(self.root, "store"))
+        self.assertIsNone(store.get("abcd"))
+        store.put("abcd", b"<p>hi</p>")
+        self.assertEqual(LocalDirectoryStore(store.root).get("abcd"), b"<p>hi</p>")
+        self.assertEqual(os.listdir(os.path.join(store.root, "ab")), ["abcd"])
+
+    def test_interface(self):
+        with self.assertRaises(NotImplementedError):
+            ArtifactStore().get("abcd")
+
+    def test_pages_are_fetched_instead_of_rendered(self):
+        source = os.path.join(self.root, "index.md")
+        with open(source, "w") as f:
+            f.write("# Home\n\n**bold**")
+        template = os.path.join(self.root, "template.html")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        store = LocalDirectoryStore(os.path.join(self.root, "store"))
+        outputs = []
+        for name in ["first", "second"]:
+            dest = os.path.join(self.root, name, "index.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages([(source, dest)], template, "/", store=store)
+            with open(dest) as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], "<title>Home</title><div><h1>Home</h1><p><b>bold</b></p></div>")
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+        dest = os.path.join(self.root, "third", "index.html")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages([(source, dest)], template, "/", io_threads=2, store=store)
+        with open(dest) as f:
+            self.assertEqual(f.read(), outputs[0])
+        self.assertEqual(store.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from bench import BENCHMARKS, compare, corpus, import_times, over_budget, run_benchmarks
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBench(unittest.TestCase):
+    def test_corpus_documents_render(self):
+        for markdown in corpus(1).values():
+            markdown_to_html_node(markdown).to_html()
+
+    def test_corpus_is_deterministic(self):
+        self.assertEqual(corpus(1), corpus(1))
+
+    def test_run_benchmarks_filter(self):
+        report = run_benchmarks(scale=1, repeat=1, pattern="markdown_to_blocks/code")
+        self.assertEqual([result["name"] for result in report["results"]], ["markdown_to_blocks/code"])
+        self.assertGreater(report["results"][0]["best"], 0)
+        self.assertNotIn("startup", report)
+
+    def test_compare(self):
+        baseline = {"results": [{"name": "a", "best": 2.0}]}
+        report = {"results": [{"name": "a", "best": 1.0}, {"name": "b", "best": 1.0}]}
+        self.assertIn("x2.00", compare(report, baseline))
+
+    def test_import_times(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     _json\n"
+            "import time:       300 |        400 |   json\n"
+            "import time:      1000 |       1400 | plan\n"
+            "import time:        50 |         50 | shard\n"
+        )
+        self.assertEqual(import_times(stderr), {"plan": 1400, "shard": 50})
+
+    def test_over_budget(self):
+        startup = {"help": {"imports_ms": 5.0, "budget_ms": 10}, "build": {"imports_ms": 20.0, "budget_ms": 10}}
+        self.assertEqual(len(over_budget(startup)), 1)
+        self.assertIn("build", over_budget(startup)[0])
+
+    def test_names_are_unique(self):
+        names = [name for name, _ in BENCHMARKS]
+        self.assertEqual(len(names), len(set(names)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import block_to_html_node, markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_hit_renders_same_html(self):
+        cache = BlockCache()
+        block = "Some **bold** [link](/x)"
+        first = cache.block_to_html_node(block, "/site/")
+        second = cache.block_to_html_node(block, "/site/")
+        expected = block_to_html_node(block, "/site/").to_html()
+        self.assertEqual(first.to_html(), expected)
+        self.assertEqual(second.to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_basepath_is_part_of_key(self):
+        cache = BlockCache()
+        cache.block_to_html_node("[a](/x)", "/")
+        node = cache.block_to_html_node("[a](/x)", "/site/")
+        self.assertEqual(node.to_html(), '<p><a href="/site/x">a</a></p>')
+        self.assertEqual(cache.misses, 2)
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.block_to_html_node("a")
+        cache.block_to_html_node("b")
+        cache.block_to_html_node("a")
+        cache.block_to_html_node("c")
+        self.assertEqual(len(cache.entries), 2)
+        self.assertIn(BlockCache.key("a", "/"), cache.entries)
+        self.assertNotIn(BlockCache.key("b", "/"), cache.entries)
+
+    def test_markdown_to_html_node_with_cache(self):
+        md = "# Title\n\nshared disclaimer\n\nbody\n\nshared disclaimer\n"
+        cache = BlockCache()
+        self.assertEqual(markdown_to_html_node(md, cache=cache).to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "cache.json")
+            cache = BlockCache()
+            cache.block_to_html_node("- a\n- b")
+            cache.save(path)
+
+            loaded = BlockCache.load(path)
+            loaded.block_to_html_node("- a\n- b")
+            self.assertEqual((loaded.hits, loaded.misses), (1, 0))
+            self.assertEqual(BlockCache.load(os.path.join(root, "missing.json")).entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
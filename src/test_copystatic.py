@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import unittest
+
+from copystatic import copy_file, is_up_to_date, sync_files_recursive
+from testutils import TempDirTestCase
+
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.manifest = os.path.join(self.root, "manifest.json")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "aaaa")
+
+    def sync(self, **kwargs):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            sync_files_recursive(self.static, self.dest, self.manifest, **kwargs)
+        return [line for line in out.getvalue().splitlines() if "->" in line or "removed" in line]
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def test_unchanged_files_are_skipped(self):
+        self.assertEqual(len(self.sync()), 2)
+        self.assertEqual(self.sync(), [])
+        self.assertEqual(self.read("images/a.png"), "aaaa")
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write("static/index.css", "body { color: red }")
+        changed = self.sync()
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_checksum_detects_same_size_edit(self):
+        self.sync()
+        path = self.write("static/images/a.png", "bbbb")
+        stat = os.stat(os.path.join(self.dest, "images", "a.png"))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.sync(), [])
+        self.assertEqual(len(self.sync(checksum=True)), 1)
+        self.assertEqual(self.read("images/a.png"), "bbbb")
+
+    def test_deleted_source_is_removed_but_pages_are_kept(self):
+        self.sync()
+        self.write("docs/index.html", "<p>page</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.sync()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_link_mode(self):
+        self.sync(link=True)
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.dest, "index.css")
+        self.assertTrue(os.path.samefile(source, dest))
+        self.assertTrue(is_up_to_date(source, dest))
+        self.assertEqual(self.sync(link=True), [])
+
+    def test_copy_does_not_write_through_links(self):
+        self.sync(link=True)
+        other = self.write("other.css", "other")
+        copy_file(other, os.path.join(self.dest, "index.css"))
+        with open(os.path.join(self.static, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+        self.assertEqual(self.read("index.css"), "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,20 @@
+import contextlib
+import io
+import os
 import unittest
 
-from gencontent import extract_title
+from blockcache import BlockCache
+from gencontent import (
+    extract_title,
+    extract_title_from_lines,
+    generate_page,
+    generate_pages,
+    generate_pages_incremental,
+    open_source,
+    scan_source,
+)
+from template import Layouts
+from testutils import TempDirTestCase
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -45,6 +59,198 @@ no title
         except Exception as e:
             pass
 
+    def test_from_lines(self):
+        lines = io.StringIO("intro\n# Title\n\nbody\n")
+        self.assertEqual(extract_title_from_lines(lines), "Title")
+
+    def test_from_binary_source(self):
+        for text in ["# Title", "intro\n# Title\n\nbody\n", "#no\n# Title ü\n", "x\n#  Title"]:
+            self.assertEqual(scan_source(io.BytesIO(text.encode())), extract_title(text))
+        self.assertIsNone(scan_source(io.BytesIO(b"# Title\n\nbody\r\n")))
+        with self.assertRaises(ValueError):
+            scan_source(io.BytesIO(b"no\n#title\n"))
+
+
+class TestOpenSource(TempDirTestCase):
+    def read(self, data):
+        path = os.path.join(self.tmp.name, "index.md")
+        with open(path, "wb") as f:
+            f.write(data)
+        with open_source(path) as (title, iter_blocks):
+            return title, list(iter_blocks())
+
+    def test_binary_and_text_paths_agree(self):
+        text = "intro\n\n# Title ü\n\n\n- a\n- b\n\n  para  \n"
+        self.assertEqual(self.read(text.encode()), ("Title ü", ["intro", "# Title ü", "- a\n- b", "para"]))
+        # Text mode translates \r\n, so such files take the line-by-line path.
+        self.assertEqual(self.read(text.replace("\n", "\r\n").encode()), self.read(text.encode()))
+
+    def test_empty_file(self):
+        with self.assertRaises(ValueError):
+            self.read(b"")
+
+    def test_file_truncated_while_read(self):
+        path = self.write("index.md", "# Title\n\n" + "paragraph\n\n" * 100000)
+        with open_source(path) as (title, iter_blocks):
+            blocks = iter_blocks()
+            self.assertEqual(next(blocks), "# Title")
+            os.truncate(path, 0)
+            self.assertLess(len(list(blocks)), 100000)
+
+    def test_generate_page_crlf(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+        dest = os.path.join(self.tmp.name, "out", "index.html")
+        for data in [b"# T\n\n- a\n- b\n", b"# T\r\n\r\n- a\r\n- b\r\n"]:
+            self.read(data)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(os.path.join(self.tmp.name, "index.md"), template, dest, "/")
+            with open(dest) as f:
+                self.assertEqual(f.read(), "T<div><h1>T</h1><ul><li>a</li><li>b</li></ul></div>")
+
+
+class TestGeneratePagesIncremental(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.manifest = os.path.join(self.root, "manifest.json")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post")
+
+    def build(self, basepath="/", explain=False):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            generate_pages_incremental(
+                self.content, self.template, self.dest, basepath, self.manifest, explain=explain
+            )
+        self.output = out.getvalue()
+        return [line for line in self.output.splitlines() if " -> " in line]
+
+    def test_only_changed_pages_rebuild(self):
+        self.assertEqual(len(self.build()), 2)
+        self.assertEqual(self.build(), [])
+
+        self.write("content/blog/post/index.md", "# Edited")
+        rebuilt = self.build()
+        self.assertEqual(len(rebuilt), 1)
+        self.assertIn("post", rebuilt[0])
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertIn("Edited", f.read())
+
+    def test_template_and_basepath_changes_rebuild_all(self):
+        self.build()
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), "<h1>Home</h1><div><h1>Home</h1></div>")
+        self.assertEqual(self.build(), [])
+        self.assertEqual(len(self.build("/site/")), 2)
+
+    def test_partial_change_rebuilds_all_and_explains(self):
+        self.write("partials/footer.html", "<footer></footer>")
+        self.write("template.html", "{{ Content }}{{> partials/footer.html }}")
+        self.build()
+        self.assertEqual(self.build(), [])
+        self.write("partials/footer.html", "<footer>new</footer>")
+        self.assertEqual(len(self.build(explain=True)), 2)
+        footer = os.path.join(self.root, "partials", "footer.html")
+        self.assertIn(f"{os.path.join(self.dest, 'index.html')}: {footer} changed", self.output)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), "<div><h1>Home</h1></div><footer>new</footer>")
+
+    def test_layout_change_rebuilds_only_its_pages(self):
+        self.write("layouts/_base.html", "<main>{% block main %}{% endblock %}</main>")
+        self.write("layouts/blog.html", "{% extends _base.html %}{% block main %}{{ Content }}{% endblock %}")
+        self.template = Layouts(os.path.join(self.root, "layouts"), self.content, self.template)
+        self.assertEqual(len(self.build()), 2)
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertEqual(f.read(), "<main><div><h1>Post</h1></div></main>")
+
+        self.write("layouts/_base.html", "<article>{% block main %}{% endblock %}</article>")
+        rebuilt = self.build()
+        self.assertEqual(len(rebuilt), 1)
+        self.assertIn("post", rebuilt[0])
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+class TestGeneratePagesParallel(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+
+    def make_pages(self, out_dir, bodies):
+        pages = []
+        for i, body in enumerate(bodies):
+            from_path = os.path.join(self.root, f"page{i}.md")
+            with open(from_path, "w") as f:
+                f.write(body)
+            pages.append((from_path, os.path.join(self.root, out_dir, f"page{i}.html")))
+        return pages
+
+    def read_outputs(self, pages):
+        outputs = []
+        for _, dest_path in pages:
+            with open(dest_path) as f:
+                outputs.append(f.read())
+        return outputs
+
+    def test_parallel_matches_serial(self):
+        bodies = [f"# Page {i}\n\nSome **bold** [link](/x/{i})" for i in range(8)]
+        serial = self.make_pages("serial", bodies)
+        parallel = self.make_pages("parallel", bodies)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(generate_pages(serial, self.template, "/base/"), [])
+            self.assertEqual(generate_pages(parallel, self.template, "/base/", jobs=3), [])
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(parallel))
+
+    def test_pipelined_matches_serial(self):
+        bodies = [f"# Page {i}\n\n- item **{i}**\n- [link](/x/{i})" for i in range(10)]
+        serial = self.make_pages("serial", bodies)
+        pipelined = [(from_path, os.path.join(self.root, "piped", "deep", f"page{i}.html")) for i, (from_path, _) in enumerate(serial)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages(serial, self.template, "/base/")
+            self.assertEqual(generate_pages(pipelined, self.template, "/base/", io_threads=3), [])
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(pipelined))
+
+    def test_pipelined_reports_failures_per_file(self):
+        pages = self.make_pages("out", ["# One", "no title", "# Three"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = generate_pages(pages, self.template, "/", io_threads=2)
+        self.assertEqual([from_path for from_path, _ in failures], [pages[1][0]])
+        self.assertTrue(os.path.exists(pages[2][1]))
+
+    def test_block_cache_matches_uncached(self):
+        bodies = [f"# Page {i}\n\nShared **disclaimer**\n\n[link](/x/{i})" for i in range(4)]
+        plain = self.make_pages("plain", bodies)
+        cached = self.make_pages("cached", bodies)
+        cache = BlockCache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages(plain, self.template, "/base/")
+            generate_pages(cached, self.template, "/base/", cache=cache)
+            generate_pages(self.make_pages("workers", bodies), self.template, "/base/", jobs=2, cache=cache)
+        self.assertEqual(self.read_outputs(plain), self.read_outputs(cached))
+        self.assertEqual(cache.hits, 3)
+
+    def test_parallel_reports_failures_per_file(self):
+        pages = self.make_pages("out", ["# One", "no title", "# Three"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = generate_pages(pages, self.template, "/", jobs=2)
+        self.assertEqual([from_path for from_path, _ in failures], [pages[1][0]])
+        self.assertIsInstance(failures[0][1], ValueError)
+        self.assertTrue(os.path.exists(pages[0][1]))
+        self.assertTrue(os.path.exists(pages[2][1]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -108,6 +109,43 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_chunks(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("b", "Bold text"),
+                ParentNode("span", [LeafNode(None, "nested")], {"class": "x"}),
+            ],
+        )
+        chunks = list(node.iter_html())
+        self.assertEqual(
+            chunks,
+            ["<p>", "<b>Bold text</b>", '<span class="x">', "nested", "</span>", "</p>"],
+        )
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_write_html(self):
+        node = ParentNode("div", [LeafNode("a", "link", {"href": "/x"})])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), '<div><a href="/x">link</a></div>')
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "leaf" + "</span>" * 200)
+
+    def test_parent_without_children_raises(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", None).to_html()
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in [HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,11 @@
+import random
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_reference,
     extract_markdown_links,
     extract_markdown_images,
 )
@@ -192,5 +194,100 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+class TestSinglePassTokenizer(unittest.TestCase):
+    FRAGMENTS = [
+        "**", "_", "`", "*", "!", "[", "]", "(", ")", "a", " ",
+        "![i](u)", "[l](v)", "![](/x)", "[t](/y_z)",
+    ]
+
+    def assertMatchesReference(self, text):
+        try:
+            expected = text_to_textnodes_reference(text)
+        except ValueError as e:
+            with self.assertRaises(ValueError) as cm:
+                text_to_textnodes(text)
+            self.assertEqual(str(cm.exception), str(e))
+            return
+        self.assertListEqual(expected, text_to_textnodes(text), repr(text))
+
+    def test_edge_cases(self):
+        for text in [
+            "",
+            "plain",
+            "****",
+            "**a_b**_c_",
+            "_a **b_ c**",
+            "`a_b`",
+            "_`a`_ and `_b_`",
+            "![a](b)[c](d)",
+            "!![a](b)",
+            "[a ![b](c) d](e)",
+            "[x](y![i](j)",
+            "**[bold link](/a)** [link](/b_c)",
+            "unclosed **bold",
+        ]:
+            self.assertMatchesReference(text)
+
+    def test_differential_random(self):
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 16)))
+            self.assertMatchesReference(text)
+
+
+def split_by_resplitting(old_nodes, extract, markdown, text_type):
+    """The original split_nodes_image/link, which re-split the remaining text
+    on every match."""
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        matches = extract(original_text)
+        if len(matches) == 0:
+            new_nodes.append(old_node)
+            continue
+        for label, url in matches:
+            sections = original_text.split(markdown.format(label, url), 1)
+            if len(sections) != 2:
+                raise ValueError("not closed")
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(label, text_type, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+class TestLinearSplitting(unittest.TestCase):
+    FRAGMENTS = ["!", "[", "]", "(", ")", "a", "b", " ", "[a](b)", "![a](b)", "[](a)", "![b]()"]
+
+    def test_matches_resplitting(self):
+        rng = random.Random(22)
+        for _ in range(5000):
+            text = "".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 16)))
+            nodes = [TextNode(text, TextType.TEXT), TextNode("[x](y)", TextType.BOLD)]
+            self.assertListEqual(
+                split_nodes_image(nodes),
+                split_by_resplitting(nodes, extract_markdown_images, "![{}]({})", TextType.IMAGE),
+                repr(text),
+            )
+            self.assertListEqual(
+                split_nodes_link(nodes),
+                split_by_resplitting(nodes, extract_markdown_links, "[{}]({})", TextType.LINK),
+                repr(text),
+            )
+
+    def test_link_text_also_inside_image(self):
+        # The link's markdown first occurs inside the image, where splitting
+        # found it too.
+        self.assertListEqual(
+            split_nodes_link([TextNode("![x](y)[x](y)", TextType.TEXT)]),
+            [TextNode("!", TextType.TEXT), TextNode("x", TextType.LINK, "y"), TextNode("[x](y)", TextType.TEXT)],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,136 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from main import main, parse_args
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+def modules_loaded_by(argv, cwd):
+    """Names of the modules loaded after running main with argv in cwd."""
+    script = f"import sys; sys.path.insert(0, {SRC!r}); import main; main.main({argv!r}); sys.stderr.write(' '.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True)
+    return set(result.stderr.split())
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_build_is_the_default_command(self):
+        args = parse_args(["/md-to-html/", "--incremental"])
+        self.assertEqual(args.command, "build")
+        self.assertEqual(args.basepath, "/md-to-html/")
+        self.assertTrue(args.incremental)
+        self.assertEqual(parse_args([]).basepath, "/")
+
+    def test_build_checks(self):
+        self.assertTrue(parse_args(["build", "--explain"]).incremental)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["build", "--shard", "1/2", "--incremental"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = parse_args(["build", "--profile", "-j", "4", "--io-threads", "4"])
+        self.assertEqual((args.jobs, args.io_threads), (1, 0))
+
+    def test_render_file(self):
+        args = parse_args(["render-file", "index.md", "/blog/", "--fragment"])
+        self.assertEqual((args.command, args.source, args.basepath, args.fragment), ("render-file", "index.md", "/blog/", True))
+
+
+class TestRenderFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        with open(self.source, "w") as f:
+            f.write("# Hi\n\n[home](/)\n")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            main(["render-file", self.source, "/blog/", *argv])
+        return out.getvalue()
+
+    def test_page(self):
+        self.assertEqual(
+            self.render("--template", self.template_path),
+            '<title>Hi</title><div><h1>Hi</h1><p><a href="/blog/">home</a></p></div>',
+        )
+
+    def test_fragment(self):
+        self.assertEqual(self.render("--fragment"), '<div><h1>Hi</h1><p><a href="/blog/">home</a></p></div>')
+
+    def test_output_file(self):
+        dest = os.path.join(self.tmp.name, "index.html")
+        self.assertEqual(self.render("--fragment", "-o", dest), "")
+        with open(dest) as f:
+            self.assertEqual(f.read(), '<div><h1>Hi</h1><p><a href="/blog/">home</a></p></div>')
+
+    def test_missing_source(self):
+        os.remove(self.source)
+        with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as e:
+            self.render()
+        self.assertEqual(e.exception.code, 1)
+        self.assertIn("index.md", err.getvalue())
+
+
+class TestBuild(unittest.TestCase):
+    def test_block_cache_file_with_empty_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "content"))
+            os.makedirs(os.path.join(root, "static"))
+            with open(os.path.join(root, "content", "index.md"), "w") as f:
+                f.write("# Hi\n")
+            with open(os.path.join(root, "template.html"), "w") as f:
+                f.write("{{ Content }}")
+            argv = [sys.executable, os.path.join(SRC, "main.py"), "--block-cache", "0", "--block-cache-file", "cache.json"]
+            subprocess.run(argv, cwd=root, capture_output=True, check=True)
+            self.assertTrue(os.path.exists(os.path.join(root, "docs", "index.html")))
+            self.assertTrue(os.path.exists(os.path.join(root, "cache.json")))
+
+    def test_merge_shards_without_shards(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "content"))
+            os.makedirs(os.path.join(root, "static"))
+            argv = [sys.executable, os.path.join(SRC, "main.py"), "--merge-shards"]
+            result = subprocess.run(argv, cwd=root, capture_output=True, text=True)
+            self.assertEqual(result.returncode, 1)
+            self.assertIn("cannot merge shards:", result.stdout)
+            self.assertNotIn("Traceback", result.stderr)
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "static"))
+        with open(os.path.join(self.tmp.name, "static", "index.css"), "w") as f:
+            f.write("body {}")
+        with open(os.path.join(self.tmp.name, "template.html"), "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        with open(os.path.join(self.tmp.name, "index.md"), "w") as f:
+            f.write("# Hi\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_file_does_not_load_the_build_pipeline(self):
+        modules = modules_loaded_by(["render-file", "index.md"], self.tmp.name)
+        self.assertIn("markdown_blocks", modules)
+        for module in ["api", "gencontent", "copystatic", "manifest", "concurrent.futures", "multiprocessing", "http.server"]:
+            self.assertNotIn(module, modules)
+
+    def test_copy_static_does_not_load_the_renderer(self):
+        modules = modules_loaded_by(["copy-static"], self.tmp.name)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "docs", "index.css")))
+        for module in ["markdown_blocks", "template", "gencontent", "concurrent.futures"]:
+            self.assertNotIn(module, modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+
+from manifest import BuildManifest, hash_file
+from testutils import TempDirTestCase
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+    def test_hash_file(self):
+        a = self.write("a.md", "# a")
+        b = self.write("b.md", "# a")
+        c = self.write("c.md", "# c")
+        self.assertEqual(hash_file(a), hash_file(b))
+        self.assertNotEqual(hash_file(a), hash_file(c))
+
+    def test_round_trip(self):
+        dest = self.write("out/index.html", "<p></p>")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(dest, "index.md", {"index.md": "abc"}, "/")
+        manifest.save()
+
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertFalse(loaded.is_stale(dest, {"index.md": "abc"}, "/"))
+        self.assertTrue(loaded.is_stale(dest, {"index.md": "def"}, "/"))
+        self.assertTrue(loaded.is_stale(dest, {"index.md": "abc"}, "/blog/"))
+
+    def test_missing_output_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        dest = os.path.join(self.root, "gone.html")
+        manifest.record(dest, "gone.md", {}, "/")
+        self.assertTrue(manifest.is_stale(dest, {}, "/"))
+
+    def test_stale_reasons(self):
+        dest = self.write("out/index.html", "<p></p>")
+        manifest = BuildManifest(self.manifest_path)
+        self.assertEqual(manifest.stale_reasons(dest, {"index.md": "a"}, "/"), ["not built before"])
+        manifest.record(dest, "index.md", {"index.md": "a", "t.html": "b"}, "/")
+        self.assertEqual(manifest.stale_reasons(dest, {"index.md": "a", "t.html": "b"}, "/"), [])
+        self.assertEqual(
+            manifest.stale_reasons(dest, {"index.md": "a", "t.html": "c", "p.html": "d"}, "/x/"),
+            ["t.html changed", "new dependency p.html", "basepath changed from / to /x/"],
+        )
+        self.assertEqual(manifest.stale_reasons(dest, {"index.md": "a"}, "/"), ["no longer depends on t.html"])
+
+    def test_load_corrupt(self):
+        self.write("manifest.json", "not json")
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+
+    def test_prune(self):
+        out = os.path.join(self.root, "out")
+        keep = self.write("out/index.html", "")
+        drop = self.write("out/blog/old/index.html", "")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(keep, "index.md", {}, "/")
+        manifest.record(drop, "blog/old/index.md", {}, "/")
+
+        removed = manifest.prune({keep}, out)
+
+        self.assertEqual(removed, [drop])
+        self.assertEqual(list(manifest.pages), [keep])
+        self.assertTrue(os.path.exists(keep))
+        self.assertFalse(os.path.exists(os.path.join(out, "blog")))
+        self.assertTrue(os.path.isdir(out))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,14 @@
+import io
+import random
 import unittest
 from markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
+    iter_markdown_blocks,
+    iter_chunk_blocks,
+    iter_block_html_nodes,
     block_to_block_type,
+    block_to_block_type_reference,
     BlockType,
 )
 
@@ -163,6 +169,89 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_basepath_applies_to_links_and_images_only(self):
+        md = """
+[home](/index) and ![logo](/logo.png)
+
+```
+<a href="/untouched">
+```
+"""
+
+        node = markdown_to_html_node(md, "/site/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/index">home</a> and <img src="/site/logo.png" alt="logo"></img></p>'
+            '<pre><code><a href="/untouched">\n</code></pre></div>',
+        )
+
+
+class TestStreamingBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        rng = random.Random(42)
+        fragments = ["\n", "\n", "\n", " ", "text", "line\n", "  \n", "# h", "- item\n"]
+        for _ in range(3000):
+            md = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 14)))
+            self.assertEqual(
+                list(iter_markdown_blocks(io.StringIO(md))),
+                markdown_to_blocks(md),
+                repr(md),
+            )
+
+    def test_chunk_blocks_match_markdown_to_blocks(self):
+        rng = random.Random(7)
+        fragments = ["\n", "\n", "\n", " ", "text", "é", "line\n", "  \n", "# h", "- item\n"]
+        for _ in range(3000):
+            data = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 14))).encode()
+            size = rng.randint(1, 8)
+            chunks = [data[i : i + size] for i in range(0, len(data), size)]
+            self.assertEqual(list(iter_chunk_blocks(chunks)), markdown_to_blocks(data.decode()), repr(data))
+
+    def test_yields_before_input_is_exhausted(self):
+        consumed = []
+
+        def lines():
+            for line in ["# title\n", "\n", "paragraph\n", "\n", "never read\n"]:
+                consumed.append(line)
+                yield line
+
+        blocks = iter_markdown_blocks(lines())
+        self.assertEqual(next(blocks), "# title")
+        self.assertEqual(len(consumed), 2)
+        self.assertEqual(next(blocks), "paragraph")
+        self.assertEqual(len(consumed), 4)
+
+    def test_block_html_nodes(self):
+        md = "# heading\n\n- a\n- _b_\n\n```\ncode\n```\n"
+        html = "".join(node.to_html() for node in iter_block_html_nodes(io.StringIO(md)))
+        self.assertEqual(html, markdown_to_html_node(md).to_html()[len("<div>") : -len("</div>")])
+
+
+class TestSingleScanClassifier(unittest.TestCase):
+    FRAGMENTS = ["\n", "- ", "-", ">", "> ", "1. ", "2. ", "3. ", "10. ", "```", "`", "# ", "#", "a", " "]
+
+    def test_edge_cases(self):
+        for block in [
+            "",
+            "```",
+            "```\n```",
+            "```code```",
+            "> a\n>b\n>",
+            "> a\nb",
+            "- a\n- b\n-c",
+            "1. a\n2. b\n3. c",
+            "1. a\n3. b",
+            "\n".join(f"{i}. item" for i in range(1, 25)),
+        ]:
+            self.assertEqual(block_to_block_type(block), block_to_block_type_reference(block), repr(block))
+
+    def test_differential_random(self):
+        rng = random.Random(17)
+        for _ in range(20000):
+            block = "".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(block_to_block_type(block), block_to_block_type_reference(block), repr(block))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from output import AtomicOutput, write_if_changed
+
+
+class TestAtomicOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_write_and_skip_unchanged(self):
+        self.assertTrue(write_if_changed(self.path, "<p>ü</p>"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_if_changed(self.path, "<p>ü</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertTrue(write_if_changed(self.path, "<p>u</p>", fsync=True))
+        self.assertEqual(self.read(), "<p>u</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_chunks_are_streamed(self):
+        with AtomicOutput(self.path) as output:
+            output.writelines(["<p>", "a", "</p>"])
+            self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(output.changed)
+        self.assertEqual(self.read(), "<p>a</p>")
+
+    def test_unchanged_output_is_compared_without_a_temporary_file(self):
+        write_if_changed(self.path, "<p>a</p><p>b</p>")
+        with AtomicOutput(self.path) as output:
+            output.writelines(["<p>a</p>", "<p>b</p>"])
+            self.assertFalse(os.path.exists(output.tmp_path))
+        self.assertFalse(output.changed)
+
+    def test_changes_after_a_matching_prefix(self):
+        old = "<p>a</p><p>b</p>"
+        for chunks in [["<p>a</p>", "<p>c</p>"], ["<p>a</p>"], ["<p>a</p>", "<p>b</p>", "<p>c</p>"], ["<p>a</p><p>b", "</p>x"]]:
+            write_if_changed(self.path, old)
+            with AtomicOutput(self.path) as output:
+                output.writelines(chunks)
+            self.assertTrue(output.changed)
+            self.assertEqual(self.read(), "".join(chunks))
+            self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_error_keeps_previous_file(self):
+        write_if_changed(self.path, "old")
+        with self.assertRaises(ValueError):
+            with AtomicOutput(self.path) as output:
+                output.write("ol")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+        with self.assertRaises(ValueError):
+            with AtomicOutput(self.path) as output:
+                output.write("new")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+from pipeline import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_every_job_flows_through_all_stages(self):
+        written = {}
+        lock = threading.Lock()
+
+        def write(job, output):
+            with lock:
+                written[job] = output
+
+        failures = run_pipeline(range(100), lambda job: job * 2, lambda job, data: f"{job}:{data}", write, io_threads=3)
+        self.assertEqual(failures, [])
+        self.assertEqual(written, {job: f"{job}:{job * 2}" for job in range(100)})
+
+    def test_render_runs_in_calling_thread_in_order(self):
+        rendered = []
+
+        def render(job, data):
+            rendered.append((job, threading.current_thread()))
+            return data
+
+        run_pipeline(range(20), lambda job: job, render, lambda job, output: None, max_pending=4)
+        self.assertEqual([job for job, _ in rendered], list(range(20)))
+        self.assertTrue(all(thread is threading.current_thread() for _, thread in rendered))
+
+    def test_failures_are_reported_per_job_in_order(self):
+        def read(job):
+            if job == 3:
+                raise OSError("unreadable")
+            return job
+
+        def render(job, data):
+            if job == 1:
+                raise ValueError("bad markdown")
+            return data
+
+        def write(job, output):
+            if job == 0:
+                raise OSError("disk full")
+
+        failures = run_pipeline(range(5), read, render, write)
+        self.assertEqual([(job, type(e)) for job, e in failures], [(0, OSError), (1, ValueError), (3, OSError)])
+
+    def test_reads_are_bounded(self):
+        started = []
+        in_flight = []
+
+        def read(job):
+            started.append(job)
+            return job
+
+        def render(job, data):
+            in_flight.append(len(started) - job)
+            return data
+
+        run_pipeline(range(50), read, render, lambda job, output: None, max_pending=5)
+        self.assertLessEqual(max(in_flight), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+
+from plan import PAGE, STATIC, Job, build_plan, dump_plan, jobs_of_kind, load_plan, scan_files
+
+
+class TestBuildPlan(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for name in [
+            "content/index.md",
+            "content/blog/b/index.md",
+            "content/blog/a/index.md",
+            "static/index.css",
+            "static/images/z.png",
+            "static/images/a.png",
+        ]:
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("# x")
+        os.makedirs(os.path.join(self.root, "static", "empty"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_scan_files_sorted(self):
+        self.assertEqual(
+            list(scan_files(self.path("static"))),
+            [self.path("static", "images", "a.png"), self.path("static", "images", "z.png"), self.path("static", "index.css")],
+        )
+
+    def test_build_plan(self):
+        plan = build_plan(self.path("content"), self.path("static"), self.path("docs"))
+        self.assertEqual(
+            plan,
+            [
+                Job(self.path("static", "images", "a.png"), self.path("docs", "images", "a.png"), STATIC),
+                Job(self.path("static", "images", "z.png"), self.path("docs", "images", "z.png"), STATIC),
+                Job(self.path("static", "index.css"), self.path("docs", "index.css"), STATIC),
+                Job(self.path("content", "blog", "a", "index.md"), self.path("docs", "blog", "a", "index.html"), PAGE),
+                Job(self.path("content", "blog", "b", "index.md"), self.path("docs", "blog", "b", "index.html"), PAGE),
+                Job(self.path("content", "index.md"), self.path("docs", "index.html"), PAGE),
+            ],
+        )
+        self.assertEqual(len(jobs_of_kind(plan, PAGE)), 3)
+
+    def test_round_trip(self):
+        plan = build_plan(self.path("content"), self.path("static"), self.path("docs"))
+        out = io.StringIO()
+        dump_plan(plan, out)
+        out.seek(0)
+        self.assertEqual(load_plan(out), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import profiling
+from gencontent import generate_page
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiling.active = None
+
+    def test_nested_stages_are_exclusive(self):
+        profiler = profiling.Profiler()
+        with profiler.stage("outer"):
+            time.sleep(0.01)
+            with profiler.stage("inner"):
+                time.sleep(0.02)
+        totals = profiler.totals()
+        self.assertEqual(totals["outer"][1], 1)
+        self.assertEqual(totals["inner"][1], 1)
+        self.assertGreaterEqual(totals["inner"][0], 0.02)
+        self.assertLess(totals["outer"][0], 0.02)
+
+    def test_helpers_are_noops_when_inactive(self):
+        items = [1, 2]
+        self.assertIs(profiling.timed("read", items), items)
+        with profiling.stage("parse"):
+            pass
+        out = io.StringIO()
+        profiling.write_chunks(out, ["a", "b"])
+        self.assertEqual(out.getvalue(), "ab")
+
+    def test_timed_counts_items(self):
+        profiling.active = profiling.Profiler()
+        self.assertEqual(list(profiling.timed("read", iter("abc"))), ["a", "b", "c"])
+        self.assertEqual(profiling.active.totals()["read"][1], 4)
+
+    def test_generate_page_stages(self):
+        profiling.active = profiling.Profiler(trace=True)
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            template = os.path.join(root, "template.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\nSome **bold** text\n\n- a\n- b\n")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, os.path.join(root, "index.html"), "/")
+
+            trace_path = os.path.join(root, "trace.json")
+            profiling.active.write_trace(trace_path)
+            with open(trace_path) as f:
+                events = json.load(f)["traceEvents"]
+
+        stages = {stage for page, stage in profiling.active.stats if page == source}
+        self.assertTrue({"read", "blocks", "parse", "inline", "serialize", "template", "write"} <= stages)
+        self.assertEqual(list(profiling.active.page_times()), [source])
+        self.assertIn(source, profiling.active.report(top=1))
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import http.client
+import os
+import socket
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from server import make_server, serve_in_thread
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body></html>'
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class TestRenderServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write(TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start(self, **kwargs):
+        server = make_server(self.template_path, "/blog/", port=0, quiet=True, **kwargs)
+        serve_in_thread(server)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def request(self, connection, method, path, body=None):
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8")
+
+    def test_render_returns_full_page(self):
+        server = self.start()
+        connection = http.client.HTTPConnection(*server.server_address)
+        self.addCleanup(connection.close)
+        status, body = self.request(connection, "POST", "/render", "# Hello\n\n[home](/)")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body,
+            '<html><title>Hello</title><link href="/blog/index.css"><body><div><h1>Hello</h1><p><a href="/blog/">home</a></p></div></body></html>',
+        )
+
+    def test_fragment_and_basepath_override(self):
+        server = self.start()
+        connection = http.client.HTTPConnection(*server.server_address)
+        self.addCleanup(connection.close)
+        status, body = self.request(connection, "POST", "/fragment?basepath=/docs/", "[home](/)")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, '<div><p><a href="/docs/">home</a></p></div>')
+
+    def test_errors(self):
+        server = self.start()
+        connection = http.client.HTTPConnection(*server.server_address)
+        self.addCleanup(connection.close)
+        self.assertEqual(self.request(connection, "POST", "/render", "no title"), (400, "no title found\n"))
+        self.assertEqual(self.request(connection, "POST", "/nope", "# x")[0], 404)
+        self.assertEqual(self.request(connection, "GET", "/health"), (200, "ok\n"))
+
+    def test_invalid_content_length(self):
+        server = self.start()
+        for length in ["abc", "-1"]:
+            connection = http.client.HTTPConnection(*server.server_address)
+            self.addCleanup(connection.close)
+            connection.putrequest("POST", "/render")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            self.assertEqual((response.status, response.read()), (400, b"invalid Content-Length\n"))
+
+    def test_concurrent_requests(self):
+        server = self.start()
+
+        def render(i):
+            connection = http.client.HTTPConnection(*server.server_address)
+            try:
+                return self.request(connection, "POST", "/fragment", f"page **{i}**")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(8) as executor:
+            responses = list(executor.map(render, range(32)))
+        self.assertEqual(responses, [(200, f"<div><p>page <b>{i}</b></p></div>") for i in range(32)])
+
+    def test_unix_socket(self):
+        socket_path = os.path.join(self.tmp.name, "render.sock")
+        self.start(socket_path=socket_path)
+        connection = UnixHTTPConnection(socket_path)
+        self.addCleanup(connection.close)
+        self.assertEqual(self.request(connection, "POST", "/fragment", "hi"), (200, "<div><p>hi</p></div>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import os
+import unittest
+
+from api import BuildConfig, build, build_shard, merge_shards
+from shard import collect_shard_outputs, parse_shard, partition_pages, write_shard_stamp
+from testutils import TempDirTestCase
+
+
+class TestShard(TempDirTestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for spec in ["0/4", "5/4", "1", "a/b", "1/2/3"]:
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_partition_balances_bytes(self):
+        sizes = [900, 500, 400, 300, 300, 200, 100, 100]
+        pages = [(self.write(f"content/{i}.md", "x" * size), f"docs/{i}.html") for i, size in enumerate(sizes)]
+        shards = partition_pages(pages, 3)
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        loads = [sum(os.path.getsize(source) for source, _ in shard) for shard in shards]
+        self.assertEqual(sorted(loads), [900, 900, 1000])
+        self.assertEqual(partition_pages(list(reversed(pages)), 3), shards)
+
+    def test_collisions_and_missing_pages(self):
+        self.write("shards/1/index.html", "a")
+        self.write("shards/2/index.html", "b")
+        self.write("shards/2/style.css", "c")
+        shard_dirs = [os.path.join(self.root, "shards", name) for name in ["1", "2"]]
+        for index, shard_dir in enumerate(shard_dirs, 1):
+            write_shard_stamp(shard_dir, "/", index, 2)
+        dest = os.path.join(self.root, "docs")
+        static = [("static/style.css", os.path.join(dest, "style.css"))]
+        with self.assertRaises(ValueError) as cm:
+            collect_shard_outputs(shard_dirs, dest, static, [os.path.join(dest, "blog", "index.html")], "/")
+        message = str(cm.exception)
+        self.assertNotIn(".shard.json", message)
+        self.assertIn("index.html built from both", message)
+        self.assertIn("style.css built from both static/style.css", message)
+        self.assertIn("blog/index.html not built by any shard", message)
+
+    def test_mismatched_stamps(self):
+        shard_dirs = [os.path.join(self.root, "shards", name) for name in ["1", "2", "3"]]
+        write_shard_stamp(shard_dirs[0], "/blog/", 1, 3)
+        write_shard_stamp(shard_dirs[1], "/", 2, 2)
+        self.write("shards/3/index.html", "c")
+        with self.assertRaises(ValueError) as cm:
+            collect_shard_outputs(shard_dirs, os.path.join(self.root, "docs"), [], [], "/")
+        message = str(cm.exception)
+        self.assertIn("shards/1 was built for basepath /blog/, not /", message)
+        self.assertIn("different shard counts: [2, 3]", message)
+        self.assertIn("shards/3 has no readable .shard.json", message)
+
+    def test_sharded_build_matches_full_build(self):
+        self.write("template.html", '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write("static/index.css", "body {}")
+        for i in range(7):
+            self.write(f"content/section{i % 3}/page{i}/index.md", f"# Page {i}\n\n" + "text " * (i * 50))
+        config = BuildConfig(
+            basepath="/site/",
+            content=os.path.join(self.root, "content"),
+            static=os.path.join(self.root, "static"),
+            dest=os.path.join(self.root, "docs"),
+            template=os.path.join(self.root, "template.html"),
+            manifest=os.path.join(self.root, ".build-manifest.json"),
+        )
+        full = config._replace(dest=os.path.join(self.root, "full"))
+        shard_dirs = [os.path.join(self.root, "shards", str(i)) for i in (1, 2, 3)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            build(full)
+            for index, shard_dir in enumerate(shard_dirs, 1):
+                self.assertEqual(build_shard(config, index, 3, shard_dir), [])
+            merge_shards(config, shard_dirs)
+
+        def tree(root):
+            files = {}
+            for dir_path, _, names in os.walk(root):
+                for name in names:
+                    with open(os.path.join(dir_path, name)) as f:
+                        files[os.path.relpath(os.path.join(dir_path, name), root)] = f.read()
+            return files
+
+        self.assertEqual(tree(config.dest), tree(full.dest))
+        self.assertEqual(len(tree(config.dest)), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+from manifest import hash_file
+from template import Layouts, Template, load_template, templates
+from testutils import TempDirTestCase
+
+
+class TestTemplate(unittest.TestCase):
+    def test_fragments_and_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.fragments, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        html = template.render({"Title": "Hello", "Content": lambda: iter(["<p>", "hi", "</p>"])})
+        self.assertEqual(html, "<title>Hello</title><p>hi</p>")
+
+    def test_slot_rendered_at_every_occurrence(self):
+        template = Template("{{ Content }}|{{ Content }}")
+        self.assertEqual(template.render({"Content": lambda: ["x"]}), "x|x")
+
+    def test_unknown_placeholder_kept(self):
+        template = Template("{{ Title }} {{ Unknown }}")
+        self.assertEqual(template.render({"Title": "T"}), "T {{ Unknown }}")
+
+    def test_basepath_rewrite_in_static_fragments(self):
+        template = Template('<link href="/index.css"><img src="/a.png">{{ Content }}', "/site/")
+        html = template.render({"Content": lambda: ['<a href="/raw">']})
+        self.assertEqual(html, '<link href="/site/index.css"><img src="/site/a.png"><a href="/raw">')
+
+    def test_load_template_is_cached(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            first = load_template(path, "/")
+            self.assertIs(load_template(path, "/"), first)
+            self.assertIsNot(load_template(path, "/other/"), first)
+
+    def test_load_template_cache_is_bounded(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            for i in range(1000):
+                load_template(path, f"/{i}/")
+            self.assertLessEqual(len(templates.entries), templates.maxsize)
+
+    def test_load_template_recompiles_edited_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            partial = os.path.join(root, "foot.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}{{> foot.html }}")
+            with open(partial, "w") as f:
+                f.write("<footer>")
+            first = load_template(path)
+            self.assertEqual(first.hashes, {path: hash_file(path), partial: hash_file(partial)})
+            with open(partial, "w") as f:
+                f.write("<footer>new")
+            second = load_template(path)
+            self.assertEqual(second.render({"Content": "C"}), "C<footer>new")
+            self.assertEqual(second.hashes[partial], hash_file(partial))
+            self.assertIs(load_template(path), second)
+
+
+class TestIncludes(TempDirTestCase):
+    def test_nested_includes_and_dependencies(self):
+        template_path = self.write("template.html", '{{> partials/head.html }}{{ Content }}{{> partials/foot.html }}')
+        head = self.write("partials/head.html", '<link href="/a.css"><title>{{ Title }}</title>{{> foot.html }}')
+        foot = self.write("partials/foot.html", "<footer></footer>")
+        template = load_template(template_path, "/site/")
+        self.assertEqual(template.dependencies, [template_path, os.path.normpath(head), os.path.normpath(foot)])
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            '<link href="/site/a.css"><title>T</title><footer></footer>C<footer></footer>',
+        )
+
+    def test_include_cycle(self):
+        template_path = self.write("template.html", "{{> a.html }}")
+        self.write("a.html", "{{> template.html }}")
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            load_template(template_path)
+
+    def test_missing_partial(self):
+        with self.assertRaises(FileNotFoundError):
+            load_template(self.write("template.html", "{{> missing.html }}"))
+
+
+class TestLayouts(TempDirTestCase):
+    def test_extends_overrides_blocks(self):
+        base = self.write("layouts/_base.html", "<h1>{% block head %}Default{% endblock %}</h1>{% block body %}{{ Content }}{% endblock %}")
+        middle = self.write("layouts/_docs.html", "{% extends _base.html %}{% block head %}Docs: {{ Title }}{% endblock %}")
+        page = self.write("layouts/docs.html", "{% extends _docs.html %}ignored{% block body %}<main>{{ Content }}</main>{% endblock %}")
+        template = load_template(page)
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "<h1>Docs: T</h1><main>C</main>")
+        self.assertEqual(template.dependencies, [page, os.path.normpath(middle), os.path.normpath(base)])
+        self.assertEqual(load_template(base).render({"Content": "C"}), "<h1>Default</h1>C")
+
+    def test_extends_cycle(self):
+        a = self.write("a.html", "{% extends b.html %}")
+        self.write("b.html", "{% extends a.html %}")
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            load_template(a)
+
+    def test_selection_by_directory(self):
+        default = self.write("template.html", "")
+        blog = self.write("layouts/blog.html", "")
+        drafts = self.write("layouts/blog/drafts.html", "")
+        self.write("layouts/_base.html", "")
+        content = os.path.join(self.root, "content")
+        layouts = Layouts(os.path.join(self.root, "layouts"), content, default)
+        self.assertEqual(layouts.template_path(os.path.join(content, "index.md")), default)
+        self.assertEqual(layouts.template_path(os.path.join(content, "blog", "index.md")), blog)
+        self.assertEqual(layouts.template_path(os.path.join(content, "blog", "post", "index.md")), blog)
+        self.assertEqual(layouts.template_path(os.path.join(content, "blog", "drafts", "x", "index.md")), drafts)
+        self.assertEqual(layouts.template_path(os.path.join(content, "_base", "index.md")), default)
+        self.assertEqual(layouts.paths(), [default, blog, drafts])
+
+
+if __name__ == "__main__":
+    unittest.main()
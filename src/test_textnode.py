@@ -24,6 +24,10 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self):
         node = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(
@@ -54,6 +58,16 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "b")
         self.assertEqual(html_node.value, "This is bold")
 
+    def test_link_basepath(self):
+        node = TextNode("home", TextType.LINK, "/blog/tom")
+        html_node = text_node_to_html_node(node, "/md-to-html/")
+        self.assertEqual(html_node.props, {"href": "/md-to-html/blog/tom"})
+
+    def test_image_basepath_keeps_absolute_urls(self):
+        node = TextNode("alt", TextType.IMAGE, "https://www.boot.dev/a.png")
+        html_node = text_node_to_html_node(node, "/md-to-html/")
+        self.assertEqual(html_node.props["src"], "https://www.boot.dev/a.png")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import contextlib
+import io
+import os
+import unittest
+
+from template import Layouts
+from testutils import TempDirTestCase
+from watch import SiteWatcher
+
+
+class TestSiteWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post")
+        self.write("static/index.css", "body {}")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/")
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        super().write(name, text)
+        if mtime is not None:
+            # Guarantee a visible mtime change on coarse-grained filesystems.
+            os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+        return path
+
+    def poll(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sorted(self.watcher.poll())
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def test_no_changes(self):
+        self.assertEqual(self.poll(), [])
+
+    def test_edited_page_rebuilds_only_that_page(self):
+        self.write("content/blog/post/index.md", "# Edited")
+        outputs = self.poll()
+        self.assertEqual(outputs, [os.path.join(self.dest, "blog", "post", "index.html")])
+        self.assertIn("Edited", self.read("blog/post/index.html"))
+        self.assertEqual(self.poll(), [])
+
+    def test_deleted_page_removes_output(self):
+        self.write("content/blog/post/index.md", "# Post")
+        self.poll()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_template_change_rebuilds_all_pages(self):
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        outputs = self.poll()
+        self.assertEqual(len(outputs), 2)
+        self.assertTrue(self.read("index.html").startswith("<h1>Home</h1>"))
+
+    def test_partial_change_rebuilds_all_pages(self):
+        self.write("partials/footer.html", "<footer>1</footer>")
+        self.write("template.html", "{{ Content }}{{> partials/footer.html }}")
+        self.assertEqual(len(self.poll()), 2)
+        self.assertEqual(self.poll(), [])
+        self.write("partials/footer.html", "<footer>2</footer>")
+        self.assertEqual(len(self.poll()), 2)
+        self.assertTrue(self.read("index.html").endswith("<footer>2</footer>"))
+
+    def test_new_layout_is_picked_up(self):
+        layouts = Layouts(os.path.join(self.root, "layouts"), self.content, self.template)
+        watcher = SiteWatcher(self.content, self.static, layouts, self.dest, "/")
+        self.write("layouts/blog.html", "<main>{{ Content }}</main>")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(len(watcher.poll()), 2)
+        self.assertEqual(self.read("blog/post/index.html"), "<main><div><h1>Post</h1></div></main>")
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_static_changes_are_copied(self):
+        self.write("static/images/new.png", "png")
+        self.assertEqual(self.poll(), [os.path.join(self.dest, "images", "new.png")])
+        self.assertEqual(self.read("images/new.png"), "png")
+
+    def test_static_change_through_hard_link(self):
+        os.makedirs(self.dest)
+        css = os.path.join(self.dest, "index.css")
+        os.link(os.path.join(self.static, "index.css"), css)
+        self.write("static/index.css", "body { margin: 0 }")
+        self.assertEqual(self.poll(), [css])
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+
+    def test_static_changes_are_linked(self):
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", link=True)
+        self.write("static/images/new.png", "png")
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher.poll()
+            self.write("static/images/new.png", "png 2")
+            watcher.poll()
+        source = os.path.join(self.static, "images", "new.png")
+        self.assertTrue(os.path.samefile(source, os.path.join(self.dest, "images", "new.png")))
+        self.assertEqual(self.read("images/new.png"), "png 2")
+
+    def test_broken_page_does_not_stop_watcher(self):
+        self.write("content/index.md", "no title")
+        self.write("content/blog/post/index.md", "# Fine")
+        outputs = self.poll()
+        self.assertEqual(outputs, [os.path.join(self.dest, "blog", "post", "index.html")])
+
+    def test_vanished_static_file_does_not_stop_watcher(self):
+        swap = self.write("static/.index.css.swp", "swap")
+        self.write("static/images/new.png", "png")
+        scan = self.watcher.scan
+
+        def scan_then_delete():
+            snapshots = scan()
+            os.remove(swap)
+            return snapshots
+
+        self.watcher.scan = scan_then_delete
+        self.assertEqual(self.poll(), [os.path.join(self.dest, "images", "new.png")])
+        self.watcher.scan = scan
+        self.assertEqual(self.poll(), [os.path.join(self.dest, ".index.css.swp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import time
+
+from copystatic import copy_file, is_up_to_date, link_file
+from gencontent import generate_page
+from manifest import remove_empty_dirs
+from plan import page_destination, scan_files, static_destination
+from template import Layouts, load_template, template_paths
+
+
+def snapshot(root):
+    """Map every file under root (or root itself, if it is a file) to its
+    (mtime_ns, size)."""
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        return {root: (stat.st_mtime_ns, stat.st_size)}
+    files = {}
+    for path in scan_files(root):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = [path for path in new if old.get(path) != new[path]]
+    removed = [path for path in old if path not in new]
+    return sorted(changed), sorted(removed)
+
+
+class SiteWatcher:
+    """Polls the content, static and template inputs of a site and rebuilds
+    only the outputs affected by each change.
+
+    The compiled template stays cached between rebuilds and is only
+    recompiled when the template file or one of its partials changes. With a
+    block cache, unchanged blocks of an edited page are not parsed again.
+    Static files are copied, or hard linked with link, like
+    copystatic.sync_files does.
+    """
+
+    def __init__(
+        self, dir_path_content, dir_path_static, template_path, dest_dir_path, basepath, cache=None, link=False, checksum=False
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.cache = cache
+        self.link = link
+        self.checksum = checksum
+        self.snapshots = self.scan()
+
+    def scan(self):
+        return {
+            "content": snapshot(self.dir_path_content),
+            "static": snapshot(self.dir_path_static),
+            "template": self.scan_template(),
+        }
+
+    def scan_template(self):
+        """Snapshot every template with the partials and layouts it uses, and
+        the layouts directory so that new layouts are noticed."""
+        files = {}
+        if isinstance(self.template_path, Layouts) and os.path.isdir(self.template_path.dir_path_layouts):
+            files.update(snapshot(self.template_path.dir_path_layouts))
+        for template_path in template_paths(self.template_path):
+            try:
+                dependencies = load_template(template_path, self.basepath).dependencies
+            except (OSError, ValueError):
+                dependencies = [template_path]
+            for path in dependencies:
+                if os.path.exists(path):
+                    files.update(snapshot(path))
+        return files
+
+    def page_dest_path(self, from_path):
+        return page_destination(from_path, self.dir_path_content, self.dest_dir_path)
+
+    def static_dest_path(self, from_path):
+        return static_destination(from_path, self.dir_path_static, self.dest_dir_path)
+
+    def poll(self):
+        """Rebuild whatever changed since the last poll and return the list
+        of outputs that were written or removed."""
+        start = time.perf_counter()
+        snapshots = self.scan()
+        changed_pages, removed_pages = diff_snapshots(self.snapshots["content"], snapshots["content"])
+        changed_static, removed_static = diff_snapshots(self.snapshots["static"], snapshots["static"])
+        template_changed = self.snapshots["template"] != snapshots["template"]
+        self.snapshots = snapshots
+
+        if template_changed:
+            if isinstance(self.template_path, Layouts):
+                self.template_path.scan()
+            # The template may now include different partials.
+            self.snapshots["template"] = self.scan_template()
+            changed_pages = sorted(snapshots["content"])
+
+        # Each output is handled on its own: a page that fails to render or a
+        # file that vanished since the scan (an editor's swap file, say) is
+        # reported and the watcher keeps going.
+        actions = [
+            *((from_path, self.generate_page) for from_path in changed_pages),
+            *((from_path, self.remove_page) for from_path in removed_pages),
+            *((from_path, self.copy_static) for from_path in changed_static),
+            *((from_path, self.remove_static) for from_path in removed_static),
+        ]
+        outputs = []
+        for from_path, action in actions:
+            try:
+                outputs.append(action(from_path))
+            except Exception as e:
+                print(f" ! {from_path}: {e}")
+
+        if outputs:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {len(outputs)} outputs in {elapsed_ms:.1f} ms")
+        return outputs
+
+    def generate_page(self, from_path):
+        dest_path = self.page_dest_path(from_path)
+        generate_page(from_path, self.template_path, dest_path, self.basepath, self.cache)
+        return dest_path
+
+    def remove_page(self, from_path):
+        return self.remove_output(self.page_dest_path(from_path))
+
+    def copy_static(self, from_path):
+        dest_path = self.static_dest_path(from_path)
+        if not is_up_to_date(from_path, dest_path, self.checksum):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            if self.link:
+                link_file(from_path, dest_path)
+            else:
+                copy_file(from_path, dest_path)
+        return dest_path
+
+    def remove_static(self, from_path):
+        return self.remove_output(self.static_dest_path(from_path))
+
+    def remove_output(self, dest_path):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), self.dest_dir_path)
+        print(f" * removed {dest_path}")
+        return dest_path
+
+    def run(self, interval=0.1):
+        templates = ", ".join(template_paths(self.template_path))
+        print(f"Watching {self.dir_path_content}, {self.dir_path_static} and {templates}...")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass